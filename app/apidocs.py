@@ -0,0 +1,107 @@
+"""Swagger UI and the /apispec.json spec, served by flasgger.
+
+Enabled by ``SWAGGER_ENABLED`` (off by default in production). flasgger and
+its jsonschema dependency are only imported when it is, and the spec is
+built on the first request to it rather than at start-up.
+"""
+
+def swag_from(specs):
+    """Attach a route's OpenAPI ``specs`` dict where flasgger looks for it.
+
+    Stands in for ``flasgger.swag_from``, which would import flasgger in
+    every worker even with the docs disabled. Validation is not supported.
+    """
+    def decorator(function):
+        function.specs_dict = specs
+        return function
+    return decorator
+
+SWAGGER_CONFIG = {
+    "headers": [],
+    "specs": [
+        {
+            "endpoint": "apispec",
+            "route": "/apispec.json",
+            "rule_filter": lambda rule: True,  # all in
+            "model_filter": lambda tag: True,  # all in
+        }
+    ],
+    "static_url_path": "/flasgger_static",
+    "swagger_ui": True,
+    "specs_route": "/apidocs/",
+}
+
+SWAGGER_TEMPLATE = {
+    "swagger": "2.0",
+    "info": {
+        "title": "Library Management System API",
+        "description": "API for managing books, users, and loans",
+        "version": "1.0"
+    },
+    # Add authentication section to template
+    "securityDefinitions": {
+        "Bearer": {
+            "type": "apiKey",
+            "name": "Authorization",
+            "in": "header",
+            "description": "JWT Authorization header using the Bearer scheme. Example: \"Bearer {token}\""
+        }
+    },
+    "security": [
+        {"Bearer": []}
+    ],
+    "definitions": {
+        "Book": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "title": {"type": "string"},
+                "author": {"type": "string"},
+                "isbn": {"type": "string"},
+                "category": {"type": "string"},
+                "available": {"type": "boolean"},
+                "due_date": {"type": "string", "format": "date", "description": "Return date for borrowed books"},
+                "is_overdue": {"type": "boolean", "description": "Indicates if the book is past its due date"}
+            }
+        },
+        "User": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "username": {"type": "string"},
+                "is_admin": {"type": "boolean"}
+            }
+        },
+        "BorrowedBook": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "user_id": {"type": "integer"},
+                "book_id": {"type": "integer"},
+                "return_date": {"type": "string", "format": "date"},
+                "returned": {"type": "boolean"},
+                "is_overdue": {"type": "boolean"}
+            }
+        },
+        "LoginCredentials": {
+            "type": "object",
+            "properties": {
+                "username": {"type": "string", "example": "admin"},
+                "password": {"type": "string", "example": "admin123"}
+            },
+            "required": ["username", "password"]
+        },
+        "Token": {
+            "type": "object",
+            "properties": {
+                "access_token": {"type": "string"},
+                "refresh_token": {"type": "string"}
+            }
+        }
+    }
+}
+
+def init_app(app):
+    if app.config["SWAGGER_ENABLED"]:
+        from flasgger import Swagger
+        Swagger(app, config=SWAGGER_CONFIG, template=SWAGGER_TEMPLATE)
@@ -1,2 +1 @@
-from app.auth.routes import auth_bp
-
+from app.auth.routes import auth_bp, well_known_bp
@@ -0,0 +1,136 @@
+"""Key ring for asymmetric (RS256/EdDSA) JWT signing and verification.
+
+With an HS* algorithm every node needs the shared ``JWT_SECRET_KEY``. With
+RS256 or EdDSA only the issuing node holds ``JWT_PRIVATE_KEY_PATH``; tokens
+carry the key id (``kid``) of the key that signed them, and verifying nodes
+look it up among the public keys they trust:
+
+- ``JWT_PUBLIC_KEY_PATHS``: PEM files, e.g. the previous key during rotation
+- ``JWT_JWKS_URL``: another node's ``/.well-known/jwks.json``, fetched and
+  cached for ``JWT_JWKS_CACHE_TTL`` seconds and refetched early (at most
+  every ``JWT_JWKS_MIN_REFRESH`` seconds) when an unknown kid shows up
+
+Requires the optional ``cryptography`` package.
+"""
+import base64
+import hashlib
+import json
+import threading
+import time
+import urllib.request
+import jwt
+from flask import current_app
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "EdDSA")
+
+def _jwk_algorithm(algorithm):
+    # PyJWT only defines these when cryptography is installed
+    from jwt.algorithms import RSAAlgorithm, OKPAlgorithm
+    return OKPAlgorithm if algorithm == "EdDSA" else RSAAlgorithm
+
+def _load_pem(path, private):
+    try:
+        from cryptography.hazmat.primitives import serialization
+    except ImportError:
+        raise RuntimeError("RS256/EdDSA JWT signing requires the 'cryptography' package")
+    with open(path, "rb") as f:
+        data = f.read()
+    if private:
+        return serialization.load_pem_private_key(data, password=None)
+    return serialization.load_pem_public_key(data)
+
+def key_thumbprint(jwk):
+    """RFC 7638 thumbprint of a public JWK, used as the default key id."""
+    required = ("crv", "kty", "x") if jwk["kty"] == "OKP" else ("e", "kty", "n")
+    canonical = json.dumps({name: jwk[name] for name in required}, separators=(",", ":"), sort_keys=True)
+    digest = hashlib.sha256(canonical.encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+class KeyRing:
+    """Signing key plus the public keys trusted for verification, by kid."""
+
+    def __init__(self, algorithm, signing_key=None, kid=None, public_keys=(),
+                 jwks_url=None, jwks_ttl=300, jwks_min_refresh=30, clock=time.monotonic):
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.jwks_url = jwks_url
+        self.jwks_ttl = jwks_ttl
+        self.jwks_min_refresh = jwks_min_refresh
+        self.clock = clock
+        self._local = {}
+        for public_key in public_keys:
+            self._local[self._kid_for(public_key)] = public_key
+        self.kid = None
+        if signing_key is not None:
+            self.kid = kid or self._kid_for(signing_key.public_key())
+            self._local[self.kid] = signing_key.public_key()
+        self._remote = {}
+        self._fetched_at = None
+        self._lock = threading.Lock()
+        self._jwks = None
+
+    def _kid_for(self, public_key):
+        return key_thumbprint(_jwk_algorithm(self.algorithm).to_jwk(public_key, as_dict=True))
+
+    def verification_key(self, kid):
+        """Public key for ``kid``; raises InvalidTokenError for unknown ids."""
+        key = self._local.get(kid)
+        if key is not None:
+            return key
+        if self.jwks_url:
+            now = self.clock()
+            key = self._remote.get(kid)
+            stale = self._fetched_at is None or now - self._fetched_at >= self.jwks_ttl
+            may_refresh = self._fetched_at is None or now - self._fetched_at >= self.jwks_min_refresh
+            if stale or (key is None and may_refresh):
+                self._refresh()
+                key = self._remote.get(kid)
+            if key is not None:
+                return key
+        raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+
+    def _refresh(self):
+        # Another thread is already fetching; keep serving the cached keys
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            with urllib.request.urlopen(self.jwks_url, timeout=5) as response:
+                keys = json.load(response)["keys"]
+            self._remote = {jwk["kid"]: jwt.PyJWK(jwk).key for jwk in keys if "kid" in jwk}
+        except (OSError, ValueError, KeyError, jwt.PyJWKError):
+            # Issuer unreachable or bad key set; retry after jwks_min_refresh
+            pass
+        finally:
+            self._fetched_at = self.clock()
+            self._lock.release()
+
+    def jwks(self):
+        """JSON Web Key Set of the keys this node signs with or trusts locally."""
+        if self._jwks is None:
+            keys = []
+            for kid, public_key in self._local.items():
+                jwk = _jwk_algorithm(self.algorithm).to_jwk(public_key, as_dict=True)
+                keys.append({**jwk, "kid": kid, "alg": self.algorithm, "use": "sig"})
+            self._jwks = {"keys": keys}
+        return self._jwks
+
+def keyring_from_config(config):
+    """Build the key ring for an asymmetric ``JWT_ALGORITHM``, else None."""
+    algorithm = config["JWT_ALGORITHM"]
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        return None
+    signing_key = None
+    if config.get("JWT_PRIVATE_KEY_PATH"):
+        signing_key = _load_pem(config["JWT_PRIVATE_KEY_PATH"], private=True)
+    public_keys = [_load_pem(path, private=False) for path in config.get("JWT_PUBLIC_KEY_PATHS", ())]
+    if signing_key is None and not public_keys and not config.get("JWT_JWKS_URL"):
+        raise RuntimeError(f"JWT_ALGORITHM={algorithm} needs JWT_PRIVATE_KEY_PATH, "
+                           "JWT_PUBLIC_KEY_PATHS or JWT_JWKS_URL")
+    return KeyRing(algorithm, signing_key=signing_key, kid=config.get("JWT_KEY_ID"),
+                   public_keys=public_keys, jwks_url=config.get("JWT_JWKS_URL"),
+                   jwks_ttl=config["JWT_JWKS_CACHE_TTL"],
+                   jwks_min_refresh=config["JWT_JWKS_MIN_REFRESH"])
+
+def get_keyring():
+    """The current app's key ring, or None when signing with a shared secret."""
+    return current_app.extensions.get("jwt_keyring")
@@ -0,0 +1,89 @@
+"""Revoked JWT ids, checked on every protected request.
+
+Each worker keeps the ids of unexpired revoked tokens in memory and pulls
+rows added to ``revoked_token`` since its last sync at most once every
+``TOKEN_REVOCATION_SYNC_INTERVAL`` seconds, so a check is a set lookup
+and a revocation made by another worker is seen within one interval.
+Revocations made by this worker apply immediately.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from flask import current_app
+from sqlalchemy import select, delete, func
+from app import db
+from app.models import RevokedToken
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class RevocationList:
+    """In-memory view of the revoked_token table for one process."""
+
+    def __init__(self, sync_interval, clock=time.monotonic):
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self._expires = {}
+        self._last_id = 0
+        self._next_sync = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        if self.clock() >= self._next_sync:
+            self.sync()
+        return jti in self._expires
+
+    def sync(self):
+        """Load revocations added since the last sync and forget expired ones."""
+        # Another thread is already syncing; answer from the current set
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            now = _utcnow()
+            rows = db.session.execute(
+                select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+                .where(RevokedToken.id > self._last_id, RevokedToken.expires_at > now)
+                .order_by(RevokedToken.id)
+            ).all()
+            expires = {jti: expires_at for jti, expires_at in self._expires.items() if expires_at > now}
+            for row_id, jti, expires_at in rows:
+                expires[jti] = expires_at
+                self._last_id = row_id
+            # Swap in a new dict so readers never see one mid-update
+            self._expires = expires
+            self._next_sync = self.clock() + self.sync_interval
+        finally:
+            self._lock.release()
+
+    def add(self, jti, expires_at):
+        self._expires = {**self._expires, jti: expires_at}
+
+def get_revocation_list():
+    revocations = current_app.extensions.get("token_revocations")
+    if revocations is None:
+        revocations = current_app.extensions.setdefault(
+            "token_revocations", RevocationList(current_app.config["TOKEN_REVOCATION_SYNC_INTERVAL"]))
+    return revocations
+
+def revoke_token(jwt_payload):
+    """Record the token's jti as revoked inside the current transaction.
+
+    Raises IntegrityError when the token was already revoked, which is how a
+    replayed refresh token is detected.
+    """
+    expires_at = datetime.fromtimestamp(jwt_payload["exp"], timezone.utc).replace(tzinfo=None)
+    db.session.add(RevokedToken(jti=jwt_payload["jti"], expires_at=expires_at))
+    db.session.flush()
+    get_revocation_list().add(jwt_payload["jti"], expires_at)
+
+def prune_revoked_tokens():
+    """Delete rows of tokens that have expired anyway; returns the count.
+
+    The newest row is always kept: SQLite would otherwise hand its id out
+    again, and workers that already synced past it would never see the new
+    revocation.
+    """
+    newest = select(func.max(RevokedToken.id)).scalar_subquery()
+    return db.session.execute(
+        delete(RevokedToken).where(RevokedToken.expires_at <= _utcnow(), RevokedToken.id < newest)
+    ).rowcount
@@ -1,12 +1,16 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token
-from flasgger import swag_from
+from flask_jwt_extended import (create_access_token, create_refresh_token,
+                                jwt_required, get_jwt, get_jwt_identity)
+from app.apidocs import swag_from
+from sqlalchemy.exc import IntegrityError
 from app.models import User
-from app import bcrypt
-import os
-import traceback
+from app.passwords import check_password, needs_rehash, hash_password
+from app.auth.revocation import revoke_token
+from app.auth.keys import get_keyring
+from app import db
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
+well_known_bp = Blueprint("well_known", __name__, url_prefix="/.well-known")
 
 @auth_bp.route("/login", methods=["POST"])
 @swag_from({
@@ -33,55 +37,92 @@ auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
     'description': 'Use this endpoint to get a JWT token. After obtaining the token, click the "Authorize" button at the top of the page, enter "Bearer YOUR_TOKEN" in the value field, and click "Authorize" to enable testing of protected endpoints.'
 })
 def login():
-    """Authenticate user and return JWT."""
-    try:
-        # Log request details for debugging
-        current_app.logger.info("Login attempt received")
-
-        # Check database connection
-        try:
-            user_count = User.query.count()
-            current_app.logger.info(f"Database connection successful. User count: {user_count}")
-        except Exception as db_error:
-            current_app.logger.error(f"Database error: {str(db_error)}")
-            return jsonify({"error": "Database connection error", "details": str(db_error)}), 500
+    """Authenticate user and return JWT.
 
-        # Check database file existence (for SQLite)
-        if 'sqlite:///' in current_app.config['SQLALCHEMY_DATABASE_URI']:
-            db_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-            if not os.path.isabs(db_path):
-                # Make path absolute if it's relative
-                db_path = os.path.join(current_app.root_path, '..', db_path)
+    Does one indexed user lookup plus the password check; database health
+    is reported by /readyz instead.
+    """
+    data = request.get_json() or {}
+    password = data.get("password", "")
+    user = User.query.filter_by(username=data.get("username")).first()
+    if not user or not check_password(user.password_hash, password):
+        return jsonify({"msg": "Bad credentials"}), 401
 
-            current_app.logger.info(f"Database path: {db_path}")
-            current_app.logger.info(f"Database exists: {os.path.exists(db_path)}")
+    # Upgrade the stored hash when the configured work factor has changed
+    if needs_rehash(user.password_hash):
+        user.password_hash = hash_password(password)
+        db.session.commit()
 
-        data = request.get_json() or {}
-        current_app.logger.info(f"Login attempt for user: {data.get('username')}")
+    return jsonify(_issue_tokens(user)), 200
 
-        user = User.query.filter_by(username=data.get("username")).first()
-        if not user or not bcrypt.check_password_hash(user.password_hash, data.get("password", "")):
-            current_app.logger.info("Authentication failed: bad credentials")
-            return jsonify({"msg": "Bad credentials"}), 401
+def _issue_tokens(user):
+    """Access and refresh token pair for ``user``."""
+    # Add additional claims to the token including is_admin flag
+    additional_claims = {
+        'is_admin': user.is_admin,
+        'username': user.username
+    }
 
-        # Add additional claims to the token including is_admin flag
-        additional_claims = {
-            'is_admin': user.is_admin,
-            'username': user.username
-        }
+    # Create token with the additional claims
+    access_token = create_access_token(
+        identity=str(user.id),
+        additional_claims=additional_claims
+    )
+    refresh_token = create_refresh_token(identity=str(user.id))
+    return {"access_token": access_token, "refresh_token": refresh_token}
 
-        # Create token with the additional claims
-        access_token = create_access_token(
-            identity=str(user.id),
-            additional_claims=additional_claims
-        )
+@auth_bp.route("/refresh", methods=["POST"])
+@jwt_required(refresh=True)
+@swag_from({
+    'tags': ['Authentication'],
+    'security': [{'Bearer': []}],
+    'responses': {
+        200: {
+            'description': 'New access and refresh tokens; the presented refresh token is revoked',
+            'schema': {
+                '$ref': '#/definitions/Token'
+            }
+        },
+        401: {'description': 'Refresh token expired, revoked or already used'}
+    },
+    'summary': 'Rotate a refresh token',
+    'description': 'Send the refresh token as "Bearer YOUR_REFRESH_TOKEN". Each refresh token can be used once.'
+})
+def refresh():
+    """Exchange a refresh token for a new token pair without a password check."""
+    user = db.session.get(User, int(get_jwt_identity()))
+    if user is None:
+        return jsonify({"msg": "User no longer exists"}), 401
+    try:
+        revoke_token(get_jwt())
+    except IntegrityError:
+        # A concurrent request rotated the same token first
+        db.session.rollback()
+        return jsonify({"msg": "Token has been revoked"}), 401
+    db.session.commit()
+    return jsonify(_issue_tokens(user)), 200
 
-        current_app.logger.info(f"Authentication successful for user: {user.username}")
-        return jsonify(access_token=access_token), 200
-    except Exception as e:
-        current_app.logger.error(f"Unexpected error in login: {str(e)}")
-        current_app.logger.error(traceback.format_exc())
-        return jsonify({"error": "Internal server error", "details": str(e)}), 500
+@auth_bp.route("/logout", methods=["POST"])
+@jwt_required(verify_type=False)
+@swag_from({
+    'tags': ['Authentication'],
+    'security': [{'Bearer': []}],
+    'responses': {
+        200: {'description': 'The presented access or refresh token is revoked'},
+        401: {'description': 'Token expired or already revoked'}
+    },
+    'summary': 'Revoke a token',
+    'description': 'Call once with the access token and once with the refresh token to end a session.'
+})
+def logout():
+    """Revoke the presented token."""
+    try:
+        revoke_token(get_jwt())
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"msg": "Token has been revoked"}), 401
+    db.session.commit()
+    return jsonify({"msg": "Token revoked"}), 200
 
 @auth_bp.route("/test-auth", methods=["GET"])
 @swag_from({
@@ -98,3 +139,21 @@ def test_auth():
     """Test endpoint requiring authentication."""
     return jsonify({"msg": "Authentication successful"}), 200
 
+
+@well_known_bp.route("/jwks.json", methods=["GET"])
+@swag_from({
+    'tags': ['Authentication'],
+    'security': [],
+    'responses': {
+        200: {'description': 'Public keys that verify this node\'s tokens, by kid (empty for HS256)'}
+    },
+    'summary': 'JSON Web Key Set',
+    'description': 'Verifying nodes set JWT_JWKS_URL to this endpoint on the issuing node.'
+})
+def jwks():
+    """Publish the public signing keys."""
+    keyring = get_keyring()
+    response = jsonify(keyring.jwks() if keyring is not None else {"keys": []})
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config["JWT_JWKS_CACHE_TTL"]
+    return response
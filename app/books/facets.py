@@ -0,0 +1,68 @@
+from sqlalchemy import func, select, delete, insert
+from sqlalchemy.dialects import sqlite, postgresql
+from app import db
+from app.models import Book, CategoryFacet
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def increment_category_facet(category, total=0, available=0):
+    """Adjust a category's counters inside the current transaction."""
+    if not total and not available:
+        return
+    dialect_insert = _UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(CategoryFacet).values(category=category, total=total, available=available)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[CategoryFacet.category],
+            set_={"total": CategoryFacet.total + total,
+                  "available": CategoryFacet.available + available},
+        ))
+        return
+
+    updated = db.session.execute(
+        db.update(CategoryFacet)
+        .where(CategoryFacet.category == category)
+        .values(total=CategoryFacet.total + total,
+                available=CategoryFacet.available + available)
+    ).rowcount
+    if not updated:
+        db.session.add(CategoryFacet(category=category, total=total, available=available))
+
+def rebuild_category_facets(connection):
+    """Recompute every category counter from the book table."""
+    connection.execute(delete(CategoryFacet))
+    connection.execute(insert(CategoryFacet).from_select(
+        ["category", "total", "available"],
+        select(Book.category,
+               func.count(Book.id),
+               func.sum(db.case((Book.available.is_(True), 1), else_=0)))
+        .group_by(Book.category)
+    ))
+
+def _empty_facets():
+    return {"total": 0, "category": {}, "available": {"true": 0, "false": 0}}
+
+def unfiltered_facets():
+    """Facets for the whole catalog, read from the counter table in O(categories)."""
+    facets = _empty_facets()
+    for row in CategoryFacet.query.filter(CategoryFacet.total > 0).order_by(CategoryFacet.category):
+        facets["category"][row.category] = row.total
+        facets["total"] += row.total
+        facets["available"]["true"] += row.available
+    facets["available"]["false"] = facets["total"] - facets["available"]["true"]
+    return facets
+
+def query_facets(query):
+    """Facets for the books matched by ``query`` with one GROUP BY aggregate."""
+    matches = query.with_entities(Book.id, Book.category, Book.available).order_by(None).subquery()
+    rows = db.session.execute(
+        select(matches.c.category, matches.c.available, func.count())
+        .group_by(matches.c.category, matches.c.available)
+    )
+    facets = _empty_facets()
+    for category, available, count in rows:
+        facets["category"][category] = facets["category"].get(category, 0) + count
+        facets["available"]["true" if available else "false"] += count
+        facets["total"] += count
+    facets["category"] = dict(sorted(facets["category"].items()))
+    return facets
@@ -0,0 +1,29 @@
+from collections import Counter
+from app.models import Book
+from app.bulk import DEFAULT_CHUNK_SIZE, RowError, import_rows
+from app.catalog import bump_catalog_version
+from app.cache import invalidate_catalog
+from app.books.facets import increment_category_facet
+
+BOOK_FIELDS = ("title", "author", "isbn", "category")
+
+def _validate(record):
+    values = {field: str(record.get(field) or "").strip() for field in BOOK_FIELDS}
+    missing = [field for field in BOOK_FIELDS if not values[field]]
+    if missing:
+        raise RowError(f"Missing fields: {', '.join(missing)}", values["isbn"] or None)
+    return values
+
+def _record_inserted(inserted):
+    for category, count in Counter(values["category"] for values in inserted).items():
+        increment_category_facet(category, total=count, available=count)
+    bump_catalog_version()
+
+def import_books(stream, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Import books from a CSV or NDJSON stream in chunked transactions.
+
+    See ``app.bulk.import_rows``; rows are keyed by ISBN, and each chunk
+    updates the category facets and the catalog version before it commits.
+    """
+    return import_rows(stream, fmt, Book, "isbn", "ISBN", _validate, chunk_size=chunk_size,
+                       before_commit=_record_inserted, after_commit=invalidate_catalog)
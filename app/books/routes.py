@@ -1,19 +1,79 @@
+from functools import partial
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from flasgger import swag_from
+from app.apidocs import swag_from
 from app.decorators import admin_required
 from app.models import Book
+from app.pagination import PAGINATION_PARAMETERS, list_response
+from app.streaming import STREAM_PARAMETERS
+from app.fields import FIELDS_PARAMETER, requested_fields, project_columns
+from app.search import apply_fulltext_search
+from app.catalog import conditional_catalog_read, bump_catalog_version
+from app.bulk import BULK_FORMATS, detect_format
+from app.books.importer import import_books
+from app.books.facets import increment_category_facet, unfiltered_facets, query_facets
+from app.cache import cached_catalog_read, serialize_books, invalidate_catalog, get_catalog_cache
 from app import db
 
 books_bp = Blueprint("books", __name__, url_prefix="/api/books")
 
+# Text filters accepted by the search and facets endpoints
+SEARCH_FILTERS = ('q', 'title', 'author', 'isbn', 'category')
+
+# Swagger parameter definitions shared by the search and facets endpoints
+SEARCH_PARAMETERS = [
+    {
+        'name': 'q',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Full-text query over title, author and category; every term must match as a word prefix. Unpaginated results are ranked by relevance'
+    },
+    {
+        'name': 'title',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Title to search for (partial match)'
+    },
+    {
+        'name': 'author',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Author to search for (partial match)'
+    },
+    {
+        'name': 'isbn',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'ISBN to search for (exact match)'
+    },
+    {
+        'name': 'category',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Category to filter by (partial match)'
+    },
+    {
+        'name': 'available',
+        'in': 'query',
+        'type': 'boolean',
+        'required': False,
+        'description': 'Filter by availability status'
+    }
+]
+
 @books_bp.route("", methods=["GET"])
 @jwt_required()
 @swag_from({
     'tags': ['Books'],
+    'parameters': [FIELDS_PARAMETER] + PAGINATION_PARAMETERS + STREAM_PARAMETERS,
     'responses': {
         200: {
-            'description': 'List of books',
+            'description': 'List of books (or {items, next_cursor} when paginated, NDJSON when streamed)',
             'schema': {
                 'type': 'array',
                 'items': {
@@ -30,13 +90,19 @@ books_bp = Blueprint("books", __name__, url_prefix="/api/books")
                     }
                 }
             }
-        }
+        },
+        304: {'description': 'Catalog unchanged since the ETag sent in If-None-Match'}
     }
 })
+@conditional_catalog_read
+@cached_catalog_read
 def list_books():
-    """Retrieve all books."""
-    books = Book.query.all()
-    return jsonify([b.to_dict() for b in books])
+    """Retrieve all books, optionally one keyset page at a time."""
+    try:
+        query, serialize = _select_fields(Book.query)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    return list_response(query, Book.id, serialize)
 
 @books_bp.route("", methods=["POST"])
 @jwt_required()
@@ -82,65 +148,128 @@ def add_book():
         available=True
     )
     db.session.add(book)
+    increment_category_facet(book.category, total=1, available=1)
+    bump_catalog_version()
     db.session.commit()
+    invalidate_catalog()
     return jsonify(book.to_dict()), 201
 
-@books_bp.route("/search", methods=["GET"])
+@books_bp.route("/bulk", methods=["POST"])
 @jwt_required()
+@admin_required
 @swag_from({
     'tags': ['Books'],
+    'consumes': ['text/csv', 'application/x-ndjson'],
     'parameters': [
         {
-            'name': 'title',
-            'in': 'query',
-            'type': 'string',
-            'required': False,
-            'description': 'Title to search for (partial match)'
-        },
-        {
-            'name': 'author',
-            'in': 'query',
-            'type': 'string',
-            'required': False,
-            'description': 'Author to search for (partial match)'
-        },
-        {
-            'name': 'isbn',
-            'in': 'query',
-            'type': 'string',
-            'required': False,
-            'description': 'ISBN to search for (exact match)'
+            'in': 'body',
+            'name': 'books',
+            'required': True,
+            'description': 'CSV with a title,author,isbn,category header, or one JSON book object per line',
+            'schema': {'type': 'string'}
         },
         {
-            'name': 'category',
+            'name': 'format',
             'in': 'query',
             'type': 'string',
+            'enum': list(BULK_FORMATS),
             'required': False,
-            'description': 'Category to filter by (partial match)'
-        },
-        {
-            'name': 'available',
-            'in': 'query',
-            'type': 'boolean',
-            'required': False,
-            'description': 'Filter by availability status'
+            'description': 'Input format; defaults to the Content-Type (NDJSON if unrecognized)'
         }
     ],
+    'responses': {
+        200: {'description': 'Import report with inserted/failed counts, per-row errors and rows per second'},
+        400: {'description': 'Unsupported format'},
+        403: {'description': 'Admin privilege required'}
+    }
+})
+def bulk_import_books():
+    """Import many books from a streamed CSV or NDJSON request body."""
+    fmt = request.args.get("format") or detect_format(request.content_type)
+    if fmt not in BULK_FORMATS:
+        return jsonify({"msg": f"Unsupported format: {fmt}"}), 400
+
+    report = import_books(request.stream, fmt)
+    return jsonify(report), 200
+
+@books_bp.route("/search", methods=["GET"])
+@jwt_required()
+@swag_from({
+    'tags': ['Books'],
+    'parameters': SEARCH_PARAMETERS + [FIELDS_PARAMETER] + PAGINATION_PARAMETERS + STREAM_PARAMETERS,
     'responses': {
         200: {
-            'description': 'List of matching books',
+            'description': 'List of matching books (or {items, next_cursor} when paginated, NDJSON when streamed)',
             'schema': {
                 'type': 'array',
                 'items': {'$ref': '#/definitions/Book'}
             }
-        }
+        },
+        304: {'description': 'Catalog unchanged since the ETag sent in If-None-Match'}
     }
 })
+@conditional_catalog_read
+@cached_catalog_read
 def search_books():
     """Search for books using various filters."""
+    try:
+        query, serialize = _select_fields(_search_query())
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    return list_response(query, Book.id, serialize)
+
+@books_bp.route("/facets", methods=["GET"])
+@jwt_required()
+@swag_from({
+    'tags': ['Books'],
+    'parameters': SEARCH_PARAMETERS,
+    'responses': {
+        200: {
+            'description': 'Match counts per category and per availability for the given search filters',
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'total': {'type': 'integer'},
+                    'category': {'type': 'object', 'additionalProperties': {'type': 'integer'}},
+                    'available': {
+                        'type': 'object',
+                        'properties': {
+                            'true': {'type': 'integer'},
+                            'false': {'type': 'integer'}
+                        }
+                    }
+                }
+            }
+        },
+        304: {'description': 'Catalog unchanged since the ETag sent in If-None-Match'}
+    }
+})
+@conditional_catalog_read
+@cached_catalog_read
+def book_facets():
+    """Count books per category and availability for a search."""
+    if not any(request.args.get(name) for name in SEARCH_FILTERS) and 'available' not in request.args:
+        return jsonify(unfiltered_facets())
+    return jsonify(query_facets(_search_query()))
+
+def _select_fields(query):
+    """Apply ?fields= to a book query; return the query and its serializer.
+
+    Only the requested columns are loaded, and ``due_date`` is added when a
+    loan field needs it.
+    """
+    fields = requested_fields(Book.FIELDS)
+    always = ("due_date",) if Book.wants_loan(fields) else ()
+    return project_columns(query, Book, fields, always), partial(serialize_books, fields=fields)
+
+def _search_query():
+    """Build the book query for the search filters in the request."""
     query = Book.query
 
     # Apply filters based on query parameters
+    if request.args.get('q'):
+        query = apply_fulltext_search(query, request.args.get('q'))
+
     if request.args.get('title'):
         query = query.filter(Book.title.ilike(f'%{request.args.get("title")}%'))
 
@@ -157,6 +286,22 @@ def search_books():
         available = request.args.get('available').lower() in ('true', '1', 't')
         query = query.filter(Book.available == available)
 
-    books = query.all()
-    return jsonify([b.to_dict() for b in books])
+    return query
+
 
+@books_bp.route("/cache-stats", methods=["GET"])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Books'],
+    'responses': {
+        200: {'description': 'Hit/miss counters and sizes of the catalog record and query caches'},
+        403: {'description': 'Admin privilege required'}
+    }
+})
+def cache_stats():
+    """Report catalog cache counters for this worker process."""
+    cache = get_catalog_cache()
+    if cache is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **cache.stats()})
@@ -0,0 +1,68 @@
+"""One-shot database setup, kept out of ``create_app``.
+
+``flask init-db`` creates or upgrades the schema, installs the search
+indexes and seeds the default accounts and sample books. Run it once per
+deploy, before the web workers start; it is safe to run again.
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from app import db, migrations, search
+from app.models import User, Book
+from app.users import search as user_search
+from app.books.facets import rebuild_category_facets
+from app.passwords import hash_password
+
+DEFAULT_USERS = [
+    {"username": "admin", "password": "admin123", "is_admin": True},
+    {"username": "user", "password": "user123", "is_admin": False},
+]
+
+SAMPLE_BOOKS = [
+    {"title": "To Kill a Mockingbird", "author": "Harper Lee", "isbn": "9780061120084", "category": "Fiction"},
+    {"title": "1984", "author": "George Orwell", "isbn": "9780451524935", "category": "Science Fiction"},
+    {"title": "The Great Gatsby", "author": "F. Scott Fitzgerald", "isbn": "9780743273565", "category": "Fiction"},
+    {"title": "Pride and Prejudice", "author": "Jane Austen", "isbn": "9780141439518", "category": "Romance"},
+    {"title": "The Hobbit", "author": "J.R.R. Tolkien", "isbn": "9780547928227", "category": "Fantasy"},
+]
+
+def init_db(seed=True):
+    """Bring the database up to date and seed it; returns the migrations applied.
+
+    Must run inside an app context. Seeding only adds the default users that
+    are missing, and the sample books when the catalog is empty.
+    """
+    app = current_app._get_current_object()
+    applied = migrations.create_or_upgrade()
+    search.init_db(app)
+    user_search.init_db(app)
+    if seed:
+        _seed()
+    return applied
+
+def _seed():
+    existing = set(db.session.execute(
+        db.select(User.username).where(User.username.in_([u["username"] for u in DEFAULT_USERS]))
+    ).scalars())
+    for user in DEFAULT_USERS:
+        if user["username"] not in existing:
+            current_app.logger.info(f"Creating user {user['username']}")
+            db.session.add(User(username=user["username"], password_hash=hash_password(user["password"]),
+                                is_admin=user["is_admin"]))
+    db.session.commit()
+
+    if db.session.query(Book.id).first() is None:
+        current_app.logger.info("Populating database with sample books")
+        db.session.add_all([Book(**book) for book in SAMPLE_BOOKS])
+        db.session.flush()
+        rebuild_category_facets(db.session.connection())
+        db.session.commit()
+
+@click.command("init-db")
+@click.option("--no-seed", is_flag=True, help="Only create or upgrade the schema.")
+@with_appcontext
+def init_db_command(no_seed):
+    """Create or upgrade the database schema and seed default data."""
+    for version, description in init_db(seed=not no_seed):
+        click.echo(f"Applied migration {version}: {description}")
+    click.echo(f"Database is at schema version {migrations.head_version()}")
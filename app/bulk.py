@@ -0,0 +1,184 @@
+import csv
+import io
+import json
+import time
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+BULK_FORMATS = ("csv", "ndjson")
+
+# Rows per transaction; also the size of each unique-key IN-list, so it is
+# kept below SQLite's bound-parameter limit
+DEFAULT_CHUNK_SIZE = 500
+
+class RowError(ValueError):
+    """A rejected input row; ``key`` is its unique-key value, when known."""
+
+    def __init__(self, message, key=None):
+        super().__init__(message)
+        self.key = key
+
+def detect_format(content_type=None, filename=None, default="ndjson"):
+    """Pick the input format from a MIME type or file extension."""
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    if filename:
+        if filename.lower().endswith(".csv"):
+            return "csv"
+        if filename.lower().endswith((".ndjson", ".jsonl")):
+            return "ndjson"
+    return default
+
+def iter_records(stream, fmt):
+    """Yield ``(row_number, record, error)`` for each input row, reading lazily.
+
+    ``stream`` may be binary or text; binary input is read as UTF-8, with or
+    without the byte order mark Excel writes. Rows that cannot be parsed are
+    yielded with ``record=None`` and an error message so the caller can
+    report them and carry on. Input that is not valid UTF-8 ends the stream
+    with one such error at the row reached, since rows after it cannot be
+    told apart.
+    """
+    if fmt not in BULK_FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    row_number = 0
+    try:
+        for row_number, record, error in _parse_records(stream, fmt):
+            yield row_number, record, error
+    except UnicodeDecodeError as e:
+        yield row_number + 1, None, f"Input is not valid UTF-8 ({e.reason}); the rest was skipped"
+
+def _parse_records(stream, fmt):
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(stream), start=1):
+            yield row_number, row, None
+        return
+
+    for row_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row_number, None, "Expected a JSON object"
+            continue
+        yield row_number, record, None
+
+def iter_chunks(records, size):
+    """Group an iterable into lists of at most ``size`` items."""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def import_rows(stream, fmt, model, key, label, validate, chunk_size=DEFAULT_CHUNK_SIZE,
+                prepare=None, before_commit=None, after_commit=None):
+    """Import ``model`` rows from a CSV or NDJSON stream in chunked transactions.
+
+    ``validate(record)`` turns a parsed record into column values or raises
+    RowError. Each chunk is then checked for rows whose unique ``key`` column
+    already exists with one IN query, passed through ``prepare(values_list)``
+    and inserted with a single executemany INSERT. ``before_commit`` gets the
+    values actually inserted, inside the chunk's transaction; ``after_commit``
+    runs once it has committed. Bad rows are skipped and reported under
+    ``label``; they never abort the rest of the import. Returns a report with
+    per-row errors and throughput.
+    """
+    start = time.perf_counter()
+    report = {"rows": 0, "inserted": 0, "failed": 0, "errors": []}
+    seen = set()
+    column = getattr(model, key)
+    duplicate_message = f"Duplicate {label} in input"
+    exists_message = f"{label[:1].upper()}{label[1:]} already exists"
+
+    def fail(row_number, message, value=None):
+        report["failed"] += 1
+        report["errors"].append({"row": row_number, key: value, "error": message})
+
+    for chunk in iter_chunks(iter_records(stream, fmt), chunk_size):
+        report["rows"] += len(chunk)
+        candidates = []
+        for row_number, record, error in chunk:
+            if error:
+                fail(row_number, error)
+                continue
+            try:
+                values = validate(record)
+            except RowError as e:
+                fail(row_number, str(e), e.key)
+                continue
+            if values[key] in seen:
+                fail(row_number, duplicate_message, values[key])
+                continue
+            seen.add(values[key])
+            candidates.append((row_number, values))
+
+        if not candidates:
+            continue
+
+        existing = set(db.session.execute(
+            select(column).where(column.in_([values[key] for _, values in candidates]))
+        ).scalars())
+        rows = []
+        for row_number, values in candidates:
+            if values[key] in existing:
+                fail(row_number, exists_message, values[key])
+            else:
+                rows.append((row_number, values))
+
+        if rows:
+            if prepare is not None:
+                rows = list(zip([row_number for row_number, _ in rows],
+                                prepare([values for _, values in rows])))
+            inserted = _insert_chunk(model, rows, before_commit,
+                                     lambda row_number, values: fail(row_number, exists_message, values[key]))
+            report["inserted"] += inserted
+            if after_commit is not None:
+                after_commit()
+
+    report["errors"].sort(key=lambda e: e["row"])
+    elapsed = time.perf_counter() - start
+    report["elapsed_seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["rows"] / elapsed) if elapsed > 0 else None
+    return report
+
+def _insert_chunk(model, rows, before_commit, conflict):
+    """Insert one chunk; returns how many rows went in."""
+    try:
+        db.session.execute(insert(model), [values for _, values in rows])
+        if before_commit is not None:
+            before_commit([values for _, values in rows])
+        db.session.commit()
+        return len(rows)
+    except IntegrityError:
+        db.session.rollback()
+
+    # A concurrent writer claimed some of these keys after the duplicate
+    # check; retry row by row so only the conflicting rows are rejected
+    inserted = []
+    for row_number, values in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(model), [values])
+            inserted.append(values)
+        except IntegrityError:
+            conflict(row_number, values)
+    if before_commit is not None:
+        before_commit(inserted)
+    db.session.commit()
+    return len(inserted)
@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, g
+from app.models import Book
+from app.pagination import MAX_PAGE_SIZE
+from app.streaming import stream_requested
+
+# Results longer than a page (unpaginated catalog scans) skip the record
+# cache: they would evict each other's records before any were reused
+RECORD_CACHE_MAX_BATCH = MAX_PAGE_SIZE
+
+class LRUCache:
+    """Thread-safe LRU cache whose entries also expire ``ttl`` seconds after being set.
+
+    With ``maxbytes`` the values must be bytes, and the cache also keeps
+    their total length under that bound; a value larger than the whole
+    bound is not stored.
+    """
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _weight(self, value):
+        return len(value) if self.maxbytes is not None else 0
+
+    def _discard(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= self._weight(entry[1])
+
+    def get(self, key):
+        """Return the cached value for ``key``, or None on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._discard(key)
+            if self.maxbytes is not None and len(value) > self.maxbytes:
+                return
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._bytes += self._weight(value)
+            while len(self._data) > self.maxsize or (self.maxbytes is not None and self._bytes > self.maxbytes):
+                self._discard(next(iter(self._data)))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+            if self.maxbytes is not None:
+                stats["bytes"] = self._bytes
+            return stats
+
+class CatalogCache:
+    """Per-process cache of serialized book records and catalog query responses.
+
+    Both caches are keyed by catalog version, so a write committed by any
+    worker process makes every older entry unreachable; ``observe_version``
+    also drops them as soon as a newer version is seen.
+    """
+
+    def __init__(self, max_records, max_queries, max_query_bytes, ttl):
+        self.records = LRUCache(max_records, ttl)
+        self.queries = LRUCache(max_queries, ttl, maxbytes=max_query_bytes)
+        self.version = None
+        self._lock = threading.Lock()
+
+    def observe_version(self, version):
+        """Clear both caches the first time a newer catalog ``version`` is seen."""
+        with self._lock:
+            if self.version is not None and version <= self.version:
+                return
+            self.version = version
+        self.records.clear()
+        self.queries.clear()
+
+    def invalidate(self):
+        """Drop every cached record and query response.
+
+        Invalidation covers the whole catalog, not single books: each write
+        bumps the catalog version, which already retires every entry in every
+        worker. Any write can also change which books a query matches (a
+        checkout moves a book between the available=true and available=false
+        results), so query responses could not be dropped per book anyway.
+        """
+        self.records.clear()
+        self.queries.clear()
+
+    def stats(self):
+        return {"records": self.records.stats(), "queries": self.queries.stats()}
+
+def init_app(app):
+    if app.config["CATALOG_CACHE_ENABLED"]:
+        app.extensions["catalog_cache"] = CatalogCache(
+            app.config["CATALOG_CACHE_MAX_RECORDS"],
+            app.config["CATALOG_CACHE_MAX_QUERIES"],
+            app.config["CATALOG_CACHE_MAX_QUERY_BYTES"],
+            app.config["CATALOG_CACHE_TTL"],
+        )
+
+def get_catalog_cache():
+    """Return the app's catalog cache, or None when caching is disabled."""
+    return current_app.extensions.get("catalog_cache")
+
+def invalidate_catalog():
+    """Free this process's cached catalog data after a catalog write has committed.
+
+    Other workers drop theirs when they next read the bumped catalog version.
+    """
+    cache = get_catalog_cache()
+    if cache is not None:
+        cache.invalidate()
+
+def serialize_books(books, fields=None):
+    """Serialize books, reusing cached records and serializing only the misses.
+
+    Only full records for at most ``RECORD_CACHE_MAX_BATCH`` books are
+    cached, and only under the catalog version read by
+    ``conditional_catalog_read``; otherwise books are serialized directly.
+    """
+    cache = get_catalog_cache()
+    version = g.get("catalog_version")
+    if cache is None or fields is not None or version is None or len(books) > RECORD_CACHE_MAX_BATCH:
+        return Book.serialize_many(books, fields=fields)
+
+    records = [cache.records.get((version, b.id)) for b in books]
+    missing = [b for b, record in zip(books, records) if record is None]
+    fresh = iter(Book.serialize_many(missing))
+    result = []
+    for book, record in zip(books, records):
+        if record is None:
+            record = next(fresh)
+            cache.records.set((version, book.id), record)
+        result.append(record)
+    return result
+
+def cached_catalog_read(fn):
+    """Serve a catalog read endpoint from the query cache when possible.
+
+    Successful JSON responses are cached per catalog version, path and query
+    string, so writes made by other worker processes are picked up too. The
+    version is read by ``conditional_catalog_read``, which must wrap this
+    decorator; without it, and for streamed responses, the cache is bypassed.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        cache = get_catalog_cache()
+        version = g.get("catalog_version")
+        if cache is None or version is None or stream_requested():
+            return fn(*args, **kwargs)
+
+        cache.observe_version(version)
+        key = (version, request.path, tuple(sorted(request.args.items(multi=True))))
+        body = cache.queries.get(key)
+        if body is not None:
+            return current_app.response_class(body, mimetype="application/json")
+
+        response = current_app.make_response(fn(*args, **kwargs))
+        if response.status_code == 200:
+            cache.queries.set(key, response.get_data())
+        return response
+    return wrapper
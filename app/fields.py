@@ -0,0 +1,38 @@
+from flask import request
+from sqlalchemy.orm import load_only
+
+# Swagger parameter definition shared by the endpoints supporting sparse fieldsets
+FIELDS_PARAMETER = {
+    'name': 'fields',
+    'in': 'query',
+    'type': 'string',
+    'required': False,
+    'description': 'Comma-separated list of fields to return, e.g. id,title'
+}
+
+def requested_fields(allowed):
+    """Return the fields named in ?fields=, or None for all of them.
+
+    Raises ValueError with a client-facing message for unknown fields.
+    """
+    raw = request.args.get('fields', '')
+    fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    if not fields:
+        return None
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def project_columns(query, model, fields, always=()):
+    """Load only the columns behind ``fields`` (plus ``always``) from ``model``.
+
+    The primary key is always loaded. Fields that are not columns are ignored.
+    """
+    if fields is None:
+        return query
+    columns = model.__table__.columns
+    names = [name for name in dict.fromkeys(fields + tuple(always)) if name in columns]
+    if not names:
+        names = [column.key for column in model.__table__.primary_key]
+    return query.options(load_only(*[getattr(model, name) for name in names]))
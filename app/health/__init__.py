@@ -0,0 +1 @@
+from app.health.routes import health_bp
@@ -0,0 +1 @@
+from app.holds.routes import holds_bp
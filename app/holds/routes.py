@@ -0,0 +1,110 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from app.apidocs import swag_from
+from sqlalchemy.exc import IntegrityError
+from app.holds.service import place_hold, queue_position
+from app.models import Book, Hold
+from app.validation import is_id
+from app import db
+
+holds_bp = Blueprint("holds", __name__, url_prefix="/api/holds")
+
+def _serialize_holds(rows):
+    return [{
+        "id": row.id,
+        "book_id": row.book_id,
+        "title": row.title,
+        "position": row.position
+    } for row in rows]
+
+def _holds_query():
+    return (db.session.query(Hold.id, Hold.book_id, Book.title, queue_position().label("position"))
+            .join(Book, Book.id == Hold.book_id))
+
+@holds_bp.route("", methods=["POST"])
+@jwt_required()
+@swag_from({
+    'tags': ['Holds'],
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'hold',
+            'schema': {
+                'type': 'object',
+                'required': ['book_id'],
+                'properties': {
+                    'book_id': {'type': 'integer'}
+                }
+            }
+        }
+    ],
+    'responses': {
+        201: {'description': 'Hold placed: {id, book_id, title, position}'},
+        400: {'description': 'Book not lent out, already borrowed by you, or already on hold'},
+        404: {'description': 'Book not found'}
+    }
+})
+def create_hold():
+    """Join the hold queue of a lent-out book."""
+    book_id = (request.get_json() or {}).get("book_id")
+    if not is_id(book_id):
+        return jsonify({"msg": "book_id must be an integer"}), 400
+    if db.session.get(Book, book_id) is None:
+        return jsonify({"msg": "Book not found"}), 404
+
+    try:
+        hold_id = place_hold(book_id, int(get_jwt_identity()))
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"msg": "You already hold this book"}), 400
+    if hold_id is None:
+        db.session.rollback()
+        return jsonify({"msg": "Book is not lent out to another user; borrow it instead"}), 400
+    db.session.commit()
+
+    row = _holds_query().filter(Hold.id == hold_id).one()
+    return jsonify(_serialize_holds([row])[0]), 201
+
+@holds_bp.route("/mine", methods=["GET"])
+@jwt_required()
+@swag_from({
+    'tags': ['Holds'],
+    'responses': {
+        200: {'description': 'The caller\'s holds with their queue positions, oldest first'}
+    }
+})
+def my_holds():
+    """List the authenticated user's holds."""
+    rows = _holds_query().filter(Hold.user_id == int(get_jwt_identity())).order_by(Hold.id).all()
+    return jsonify(_serialize_holds(rows))
+
+@holds_bp.route("/<int:hold_id>", methods=["DELETE"])
+@jwt_required()
+@swag_from({
+    'tags': ['Holds'],
+    'parameters': [
+        {
+            'in': 'path',
+            'name': 'hold_id',
+            'type': 'integer',
+            'required': True,
+            'description': 'ID of the hold to cancel'
+        }
+    ],
+    'responses': {
+        200: {'description': 'Hold cancelled'},
+        403: {'description': 'Hold belongs to another user'},
+        404: {'description': 'Hold not found'}
+    }
+})
+def cancel_hold(hold_id):
+    """Cancel a hold; admins may cancel any user's hold."""
+    hold = db.session.get(Hold, hold_id)
+    if hold is None:
+        return jsonify({"msg": "Hold not found"}), 404
+    if hold.user_id != int(get_jwt_identity()) and not get_jwt().get("is_admin", False):
+        return jsonify({"msg": "Hold belongs to another user"}), 403
+
+    db.session.delete(hold)
+    db.session.commit()
+    return jsonify({"msg": "Hold cancelled"}), 200
@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+from flask import current_app
+from sqlalchemy import select, insert, update, delete, exists, func, case, literal
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import Book, BorrowedBook, Hold
+from app.loans.stats import record_checkouts
+
+def place_hold(book_id, user_id):
+    """Queue ``user_id`` for a lent-out book inside the current transaction.
+
+    The hold is inserted only while the book is lent to someone else, in the
+    same statement that checks it, so a concurrent return cannot strand it
+    on an available book. Returns the new hold id, or None if the book is
+    not lent out or is lent to the user. A second hold by the same user
+    raises IntegrityError.
+    """
+    lent_to_other = exists().where(Book.id == book_id, Book.available.is_(False),
+                                   Book.borrower_id != user_id)
+    return db.session.execute(
+        insert(Hold)
+        .from_select(["book_id", "user_id"],
+                     select(literal(book_id), literal(user_id)).where(lent_to_other))
+        .returning(Hold.id)
+    ).scalar()
+
+def queue_position():
+    """Correlated 1-based position of ``Hold`` in its book's queue."""
+    ahead = aliased(Hold)
+    return (select(func.count(ahead.id))
+            .where(ahead.book_id == Hold.book_id, ahead.id <= Hold.id)
+            .scalar_subquery())
+
+def hand_off_to_holds(book_ids):
+    """Lend just-returned books to the head of their hold queues.
+
+    The queue heads are popped with one DELETE ... RETURNING on the
+    (book_id, id) index, so a return with no holds costs one index probe.
+    Each popped user gets a new loan due ``HOLD_LOAN_DAYS`` from today and
+    the book stays unavailable. Returns ``{book_id: user_id}`` for the books
+    handed off.
+    """
+    heads = select(func.min(Hold.id)).where(Hold.book_id.in_(list(book_ids))).group_by(Hold.book_id)
+    popped = db.session.execute(
+        delete(Hold).where(Hold.id.in_(heads)).returning(Hold.book_id, Hold.user_id)
+    ).all()
+    if not popped:
+        return {}
+
+    handed_to = dict(popped)
+    due = date.today() + timedelta(days=current_app.config["HOLD_LOAN_DAYS"])
+    lent = db.session.execute(
+        update(Book)
+        .where(Book.id.in_(list(handed_to)))
+        .values(due_date=due, borrower_id=case(handed_to, value=Book.id))
+        .returning(Book.id, Book.category)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.execute(insert(BorrowedBook), [
+        {"book_id": book_id, "user_id": user_id, "return_date": due}
+        for book_id, user_id in handed_to.items()
+    ])
+    record_checkouts((book_id, category, due) for book_id, category in lent)
+    return handed_to
@@ -1 +1,35 @@
+from flask_jwt_extended.default_callbacks import default_decode_key_callback, default_encode_key_callback
+from app import jwt
+from app.auth.keys import keyring_from_config, get_keyring
+from app.auth.revocation import get_revocation_list
 
+def init_app(app):
+    """Load the asymmetric signing and verification keys, if configured."""
+    app.extensions["jwt_keyring"] = keyring_from_config(app.config)
+
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    """Reject tokens revoked by logout or refresh-token rotation."""
+    return get_revocation_list().is_revoked(jwt_payload["jti"])
+
+@jwt.additional_headers_loader
+def add_key_id(identity):
+    keyring = get_keyring()
+    return {"kid": keyring.kid} if keyring is not None and keyring.kid else {}
+
+@jwt.encode_key_loader
+def signing_key(identity):
+    keyring = get_keyring()
+    if keyring is None:
+        return default_encode_key_callback(identity)
+    if keyring.signing_key is None:
+        raise RuntimeError("This node only verifies tokens; set JWT_PRIVATE_KEY_PATH to issue them")
+    return keyring.signing_key
+
+@jwt.decode_key_loader
+def verification_key(jwt_header, jwt_payload):
+    """Pick the public key named by the token's kid from the key ring."""
+    keyring = get_keyring()
+    if keyring is None:
+        return default_decode_key_callback(jwt_header, jwt_payload)
+    return keyring.verification_key(jwt_header.get("kid"))
@@ -0,0 +1,48 @@
+"""Archival of returned loans into the borrowed_book_history table.
+
+Active loans and recent returns stay in borrowed_book, which every checkout,
+return and overdue query reads; loans returned more than N days ago are
+moved to borrowed_book_history in batches, one transaction per batch.
+
+The job runs from the ``archive-loans`` command, either scheduled or as a
+single long-running process with ``--every``; web workers never run it.
+"""
+from datetime import date, timedelta
+from sqlalchemy import select, insert, delete, func
+from app.models import BorrowedBook, LoanHistory
+
+ARCHIVED_COLUMNS = ("id", "user_id", "book_id", "return_date", "returned_on")
+
+def archive_returned_loans(engine, older_than_days, batch_size, today=None):
+    """Move loans returned more than ``older_than_days`` ago to the history table.
+
+    Loans returned before ``returned_on`` was recorded are aged by their due
+    date. The newest borrowed_book row is never moved, so SQLite cannot hand
+    its id out again to a new loan. Returns the number of loans moved.
+    """
+    cutoff = (today or date.today()) - timedelta(days=older_than_days)
+    returned_before_cutoff = (
+        BorrowedBook.returned.is_(True),
+        func.coalesce(BorrowedBook.returned_on, BorrowedBook.return_date) < cutoff,
+    )
+    moved = 0
+    while True:
+        with engine.begin() as connection:
+            newest = connection.execute(select(func.max(BorrowedBook.id))).scalar()
+            if newest is None:
+                return moved
+            ids = connection.execute(
+                select(BorrowedBook.id)
+                .where(*returned_before_cutoff, BorrowedBook.id < newest)
+                .order_by(BorrowedBook.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                return moved
+            connection.execute(insert(LoanHistory).from_select(
+                ARCHIVED_COLUMNS,
+                select(*(BorrowedBook.__table__.c[name] for name in ARCHIVED_COLUMNS))
+                .where(BorrowedBook.id.in_(ids))
+            ))
+            connection.execute(delete(BorrowedBook).where(BorrowedBook.id.in_(ids)))
+        moved += len(ids)
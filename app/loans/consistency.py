@@ -0,0 +1,73 @@
+from sqlalchemy import select, update, exists, func, and_, or_
+from app.models import Book, BorrowedBook
+
+def _active_loans():
+    return select(BorrowedBook.id).where(
+        BorrowedBook.book_id == Book.id,
+        BorrowedBook.returned.is_(False)
+    )
+
+def _latest_active(column):
+    """Correlated subquery for ``column`` of the book's most recent active loan."""
+    return (select(column)
+            .where(BorrowedBook.book_id == Book.id, BorrowedBook.returned.is_(False))
+            .order_by(BorrowedBook.id.desc())
+            .limit(1)
+            .scalar_subquery())
+
+def _lent_drift():
+    """Books with an active loan whose denormalized state disagrees with it."""
+    return and_(
+        exists(_active_loans()),
+        or_(Book.available.is_(True),
+            Book.due_date.is_distinct_from(_latest_active(BorrowedBook.return_date)),
+            Book.borrower_id.is_distinct_from(_latest_active(BorrowedBook.user_id)))
+    )
+
+def _free_drift():
+    """Books without an active loan that are still marked as lent out."""
+    return and_(
+        ~exists(_active_loans()),
+        or_(Book.available.is_(False),
+            Book.due_date.is_not(None),
+            Book.borrower_id.is_not(None))
+    )
+
+def find_loan_state_drift(connection):
+    """Report books whose denormalized loan columns disagree with borrowed_book.
+
+    Returns the ids of drifted books, split by whether they have an active
+    loan, plus the ids of books with more than one active loan.
+    """
+    lent = connection.execute(select(Book.id).where(_lent_drift()).order_by(Book.id)).scalars().all()
+    free = connection.execute(select(Book.id).where(_free_drift()).order_by(Book.id)).scalars().all()
+    duplicates = connection.execute(
+        select(BorrowedBook.book_id)
+        .where(BorrowedBook.returned.is_(False))
+        .group_by(BorrowedBook.book_id)
+        .having(func.count() > 1)
+        .order_by(BorrowedBook.book_id)
+    ).scalars().all()
+    return {"lent": lent, "free": free, "duplicate_active_loans": duplicates}
+
+def repair_loan_state(connection):
+    """Rewrite drifted book rows from borrowed_book with two set-based UPDATEs.
+
+    A book with several active loans takes the most recent one. Returns the
+    number of book rows changed.
+    """
+    lent = connection.execute(
+        update(Book)
+        .where(_lent_drift())
+        .values(available=False,
+                due_date=_latest_active(BorrowedBook.return_date),
+                borrower_id=_latest_active(BorrowedBook.user_id))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    free = connection.execute(
+        update(Book)
+        .where(_free_drift())
+        .values(available=True, due_date=None, borrower_id=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return lent + free
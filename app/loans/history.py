@@ -0,0 +1,56 @@
+from datetime import date
+from flask import request
+from sqlalchemy import select, union_all, literal
+from app import db
+from app.models import Book, BorrowedBook, LoanHistory
+from app.pagination import page_response
+
+# Swagger parameter definition for the per-user loan listings
+ACTIVE_PARAMETER = {
+    'name': 'active',
+    'in': 'query',
+    'type': 'boolean',
+    'required': False,
+    'description': 'true for current loans only, false for returned loans only'
+}
+
+def user_loans_query(user_id, active=None):
+    """Loans of one user with the book title joined in the same query.
+
+    Reads borrowed_book together with borrowed_book_history unless only
+    active loans are wanted. Returns the query and its key column.
+    """
+    hot = select(BorrowedBook.id, BorrowedBook.book_id,
+                 BorrowedBook.return_date, BorrowedBook.returned).where(BorrowedBook.user_id == user_id)
+    if active is not None:
+        hot = hot.where(BorrowedBook.returned.is_(not active))
+    if active:
+        loans = hot.subquery()
+    else:
+        cold = select(LoanHistory.id, LoanHistory.book_id,
+                      LoanHistory.return_date, literal(True).label("returned")).where(LoanHistory.user_id == user_id)
+        loans = union_all(hot, cold).subquery()
+
+    query = (db.session.query(loans.c.id, loans.c.book_id, Book.title,
+                              loans.c.return_date, loans.c.returned)
+             .join(Book, Book.id == loans.c.book_id))
+    return query, loans.c.id
+
+def serialize_user_loans(rows):
+    today = date.today()
+    return [{
+        "id": row.id,
+        "book_id": row.book_id,
+        "title": row.title,
+        "return_date": str(row.return_date),
+        "returned": row.returned,
+        "is_overdue": not row.returned and today > row.return_date
+    } for row in rows]
+
+def user_loans_response(user_id):
+    """One page of a user's loans, newest first."""
+    active = None
+    if 'active' in request.args:
+        active = request.args.get('active').lower() in ('true', '1', 't')
+    query, key_column = user_loans_query(user_id, active)
+    return page_response(query, key_column, serialize_user_loans, descending=True)
@@ -1,13 +1,29 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
-from flasgger import swag_from
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.apidocs import swag_from
 from app.decorators import admin_required
-from app.models import Book, BorrowedBook
+from sqlalchemy.exc import IntegrityError
+from app.catalog import bump_catalog_version
+from app.cache import invalidate_catalog
+from app.validation import is_id
+from app.loans.service import checkout, checkout_many, checkin_many
+from app.models import Book, BorrowedBook, User
+from app.pagination import PAGINATION_PARAMETERS, list_response
+from app.streaming import STREAM_PARAMETERS
+from app.loans.history import ACTIVE_PARAMETER, user_loans_response
+from app.loans.stats import loan_stats
 from app import db
-from datetime import datetime
+from datetime import datetime, date
 
 loans_bp = Blueprint("loans", __name__, url_prefix="/api/loans")
 
+# Upper bound on items per batch request; keeps each IN-list below SQLite's
+# bound-parameter limit
+MAX_BATCH_SIZE = 500
+
+# Upper bound on the most-borrowed ranking in the stats endpoint
+MAX_STATS_TOP = 100
+
 @loans_bp.route("/assign", methods=["POST"])
 @jwt_required()
 @admin_required
@@ -30,31 +46,33 @@ loans_bp = Blueprint("loans", __name__, url_prefix="/api/loans")
     ],
     'responses': {
         200: {'description': 'Book assigned'},
-        400: {'description': 'Book not available or invalid date'},
+        400: {'description': 'Book not available, invalid ids or invalid date'},
         403: {'description': 'Admin privilege required'}
     }
 })
 def assign_book():
     """Assign a book to a user."""
     data = request.get_json() or {}
-    # Using db.session.get() instead of Query.get()
-    book = db.session.get(Book, data.get("book_id"))
-    if not book or not book.available:
-        return jsonify({"msg": "Book not available"}), 400
-
     try:
         due = datetime.fromisoformat(data.get("return_date")).date()
     except Exception:
         return jsonify({"msg": "Invalid return_date format"}), 400
 
-    book.available = False
-    loan = BorrowedBook(
-        user_id=data["user_id"],
-        book_id=book.id,
-        return_date=due
-    )
-    db.session.add(loan)
-    db.session.commit()
+    book_id, user_id = data.get("book_id"), data.get("user_id")
+    if not is_id(book_id) or not is_id(user_id):
+        return jsonify({"msg": "book_id and user_id must be integers"}), 400
+    if not checkout(book_id, user_id, due):
+        db.session.rollback()
+        return jsonify({"msg": "Book not available"}), 400
+
+    bump_catalog_version()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # The active-loan unique index caught a loan the book row did not reflect
+        db.session.rollback()
+        return jsonify({"msg": "Book not available"}), 400
+    invalidate_catalog()
     return jsonify({"msg": "Book assigned"}), 200
 
 @loans_bp.route("/return/<int:book_id>", methods=["POST"])
@@ -72,20 +90,285 @@ def assign_book():
         }
     ],
     'responses': {
-        200: {'description': 'Book returned'},
+        200: {'description': 'Book returned, or lent to the next user in its hold queue'},
         400: {'description': 'No active loan'},
         403: {'description': 'Admin privilege required'}
     }
 })
 def return_book(book_id):
     """Return a borrowed book."""
-    loan = BorrowedBook.query.filter_by(book_id=book_id, returned=False).first()
-    if not loan:
+    returned = checkin_many([book_id])
+    if book_id not in returned:
+        db.session.rollback()
         return jsonify({"msg": "No active loan"}), 400
 
-    loan.returned = True
-    # Using db.session.get() instead of Query.get()
-    book = db.session.get(Book, book_id)
-    book.available = True
+    bump_catalog_version()
     db.session.commit()
+    invalidate_catalog()
+    if returned[book_id] is not None:
+        return jsonify({"msg": "Book returned and lent to the next hold", "user_id": returned[book_id]}), 200
     return jsonify({"msg": "Book returned"}), 200
+
+def _parse_assignment(item):
+    """Validate one batch assignment; raise ValueError with the reason."""
+    if not isinstance(item, dict):
+        raise ValueError("Expected an object")
+    book_id, user_id = item.get("book_id"), item.get("user_id")
+    if not is_id(book_id) or not is_id(user_id):
+        raise ValueError("book_id and user_id must be integers")
+    try:
+        due = datetime.fromisoformat(item.get("return_date")).date()
+    except Exception:
+        raise ValueError("Invalid return_date format")
+    return book_id, user_id, due
+
+@loans_bp.route("/assign/batch", methods=["POST"])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Loans'],
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'batch',
+            'schema': {
+                'type': 'object',
+                'required': ['assignments'],
+                'properties': {
+                    'assignments': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'required': ['book_id', 'user_id', 'return_date'],
+                            'properties': {
+                                'book_id': {'type': 'integer'},
+                                'user_id': {'type': 'integer'},
+                                'return_date': {'type': 'string', 'format': 'date'}
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {'description': 'Per-item outcomes; successful items are committed in one transaction'},
+        400: {'description': 'Malformed batch'},
+        403: {'description': 'Admin privilege required'}
+    }
+})
+def assign_books_batch():
+    """Assign many books in one transaction."""
+    items = (request.get_json() or {}).get("assignments")
+    if not isinstance(items, list) or not 0 < len(items) <= MAX_BATCH_SIZE:
+        return jsonify({"msg": f"assignments must be a list of 1-{MAX_BATCH_SIZE} items"}), 400
+
+    results = [None] * len(items)
+    assignments = {}
+    positions = {}
+    for i, item in enumerate(items):
+        try:
+            book_id, user_id, due = _parse_assignment(item)
+        except ValueError as e:
+            results[i] = {"book_id": item.get("book_id") if isinstance(item, dict) else None,
+                          "ok": False, "msg": str(e)}
+            continue
+        if book_id in assignments:
+            results[i] = {"book_id": book_id, "ok": False, "msg": "Duplicate book_id in batch"}
+            continue
+        assignments[book_id] = (user_id, due)
+        positions[book_id] = i
+
+    lent = checkout_many(assignments)
+    for book_id, i in positions.items():
+        results[i] = ({"book_id": book_id, "ok": True, "msg": "Book assigned"} if book_id in lent
+                      else {"book_id": book_id, "ok": False, "msg": "Book not available"})
+
+    if lent:
+        bump_catalog_version()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"msg": "A book already has an active loan; no changes applied"}), 400
+    invalidate_catalog()
+    return jsonify({"results": results, "succeeded": len(lent), "failed": len(items) - len(lent)}), 200
+
+@loans_bp.route("/return/batch", methods=["POST"])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Loans'],
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'batch',
+            'schema': {
+                'type': 'object',
+                'required': ['book_ids'],
+                'properties': {
+                    'book_ids': {'type': 'array', 'items': {'type': 'integer'}}
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {'description': 'Per-item outcomes; successful items are committed in one transaction'},
+        400: {'description': 'Malformed batch'},
+        403: {'description': 'Admin privilege required'}
+    }
+})
+def return_books_batch():
+    """Return many borrowed books in one transaction."""
+    book_ids = (request.get_json() or {}).get("book_ids")
+    if (not isinstance(book_ids, list) or not 0 < len(book_ids) <= MAX_BATCH_SIZE
+            or not all(is_id(book_id) for book_id in book_ids)):
+        return jsonify({"msg": f"book_ids must be a list of 1-{MAX_BATCH_SIZE} integers"}), 400
+
+    returned = checkin_many(set(book_ids))
+    results = []
+    reported = set()
+    for book_id in book_ids:
+        if book_id in returned and book_id not in reported:
+            results.append({"book_id": book_id, "ok": True, "msg": "Book returned"}
+                           if returned[book_id] is None else
+                           {"book_id": book_id, "ok": True, "msg": "Book returned and lent to the next hold",
+                            "user_id": returned[book_id]})
+            reported.add(book_id)
+        elif book_id in reported:
+            results.append({"book_id": book_id, "ok": False, "msg": "Duplicate book_id in batch"})
+        else:
+            results.append({"book_id": book_id, "ok": False, "msg": "No active loan"})
+
+    if returned:
+        bump_catalog_version()
+    db.session.commit()
+    invalidate_catalog()
+    return jsonify({"results": results, "succeeded": len(returned), "failed": len(book_ids) - len(returned)}), 200
+
+OVERDUE_LOAN_COLUMNS = ["id", "user_id", "username", "book_id", "title", "return_date", "days_overdue"]
+OVERDUE_USER_COLUMNS = ["user_id", "username", "overdue_count", "oldest_return_date"]
+
+def _serialize_overdue_loans(rows, today):
+    return [{
+        "id": row.id,
+        "user_id": row.user_id,
+        "username": row.username,
+        "book_id": row.book_id,
+        "title": row.title,
+        "return_date": str(row.return_date),
+        "days_overdue": (today - row.return_date).days
+    } for row in rows]
+
+def _serialize_overdue_users(rows):
+    return [{
+        "user_id": row.user_id,
+        "username": row.username,
+        "overdue_count": row.overdue_count,
+        "oldest_return_date": str(row.oldest_return_date)
+    } for row in rows]
+
+@loans_bp.route("/overdue", methods=["GET"])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Loans'],
+    'parameters': [
+        {
+            'name': 'group_by',
+            'in': 'query',
+            'type': 'string',
+            'enum': ['user'],
+            'required': False,
+            'description': 'Aggregate overdue loans per user'
+        },
+        {
+            'name': 'format',
+            'in': 'query',
+            'type': 'string',
+            'enum': ['csv'],
+            'required': False,
+            'description': 'Stream the full report as CSV (also selected by Accept: text/csv)'
+        }
+    ] + PAGINATION_PARAMETERS + STREAM_PARAMETERS,
+    'responses': {
+        200: {'description': 'Overdue loans with borrower and title, or per-user counts when grouped'},
+        400: {'description': 'Invalid group_by or pagination parameters'},
+        403: {'description': 'Admin privilege required'}
+    }
+})
+def overdue_report():
+    """List active loans past their due date, filtered in SQL.
+
+    Unpaginated and exported reports are ordered most overdue first; pages
+    follow loan id order.
+    """
+    today = date.today()
+    overdue = (BorrowedBook.returned.is_(False), BorrowedBook.return_date < today)
+    group_by = request.args.get("group_by")
+
+    if group_by == "user":
+        query = (db.session.query(
+                    BorrowedBook.user_id.label("user_id"),
+                    User.username,
+                    db.func.count(BorrowedBook.id).label("overdue_count"),
+                    db.func.min(BorrowedBook.return_date).label("oldest_return_date"))
+                 .join(User, User.id == BorrowedBook.user_id)
+                 .filter(*overdue)
+                 .group_by(BorrowedBook.user_id, User.username))
+        return list_response(query, BorrowedBook.user_id, _serialize_overdue_users,
+                             csv_columns=OVERDUE_USER_COLUMNS, csv_filename="overdue_by_user.csv")
+    if group_by:
+        return jsonify({"msg": "group_by must be 'user'"}), 400
+
+    query = (db.session.query(
+                BorrowedBook.id, BorrowedBook.user_id, User.username,
+                BorrowedBook.book_id, Book.title, BorrowedBook.return_date)
+             .join(User, User.id == BorrowedBook.user_id)
+             .join(Book, Book.id == BorrowedBook.book_id)
+             .filter(*overdue)
+             .order_by(BorrowedBook.return_date))
+    return list_response(query, BorrowedBook.id, lambda rows: _serialize_overdue_loans(rows, today),
+                         csv_columns=OVERDUE_LOAN_COLUMNS, csv_filename="overdue_loans.csv")
+
+@loans_bp.route("/stats", methods=["GET"])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Loans'],
+    'parameters': [
+        {
+            'name': 'top',
+            'in': 'query',
+            'type': 'integer',
+            'default': 10,
+            'required': False,
+            'description': f'Length of the most-borrowed ranking (1-{MAX_STATS_TOP})'
+        }
+    ],
+    'responses': {
+        200: {'description': 'Most-borrowed books, loans per category, utilization and overdue rate'},
+        400: {'description': 'Invalid top'},
+        403: {'description': 'Admin privilege required'}
+    }
+})
+def circulation_stats():
+    """Circulation statistics read from the counter tables."""
+    top = request.args.get("top", 10, type=int)
+    if not 0 < top <= MAX_STATS_TOP:
+        return jsonify({"msg": f"top must be between 1 and {MAX_STATS_TOP}"}), 400
+    return jsonify(loan_stats(top))
+
+@loans_bp.route("/mine", methods=["GET"])
+@jwt_required()
+@swag_from({
+    'tags': ['Loans'],
+    'parameters': [ACTIVE_PARAMETER] + PAGINATION_PARAMETERS,
+    'responses': {
+        200: {'description': 'One page of the caller\'s loans with book titles, newest first: {items, next_cursor}'},
+        401: {'description': 'Authentication required'}
+    }
+})
+def my_loans():
+    """List the authenticated user's loans."""
+    return user_loans_response(int(get_jwt_identity()))
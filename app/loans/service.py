@@ -0,0 +1,84 @@
+from collections import Counter
+from datetime import date
+from sqlalchemy import update, insert, case
+from app import db
+from app.models import Book, BorrowedBook
+from app.books.facets import increment_category_facet
+from app.holds.service import hand_off_to_holds
+from app.loans.stats import record_checkouts, record_checkins
+
+def _adjust_available_facets(categories, delta):
+    for category, count in Counter(categories).items():
+        increment_category_facet(category, available=delta * count)
+
+def checkout_many(assignments):
+    """Lend several books inside the current transaction.
+
+    ``assignments`` maps book ids to ``(user_id, due)``. All books are claimed
+    with one compare-and-set UPDATE, so when workers race for a book exactly
+    one of them matches its row; the loans are then inserted with a single
+    executemany INSERT. Returns the set of book ids that were lent.
+    """
+    if not assignments:
+        return set()
+
+    claimed = db.session.execute(
+        update(Book)
+        .where(Book.id.in_(list(assignments)), Book.available.is_(True))
+        .values(available=False,
+                due_date=case({book_id: due for book_id, (_, due) in assignments.items()}, value=Book.id),
+                borrower_id=case({book_id: user_id for book_id, (user_id, _) in assignments.items()}, value=Book.id))
+        .returning(Book.id, Book.category)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not claimed:
+        return set()
+
+    db.session.execute(insert(BorrowedBook), [
+        {"book_id": book_id, "user_id": assignments[book_id][0], "return_date": assignments[book_id][1]}
+        for book_id, _ in claimed
+    ])
+    _adjust_available_facets([category for _, category in claimed], -1)
+    record_checkouts((book_id, category, assignments[book_id][1]) for book_id, category in claimed)
+    return {book_id for book_id, _ in claimed}
+
+def checkin_many(book_ids):
+    """Close the active loans of several books inside the current transaction.
+
+    The loans are closed with one conditional UPDATE, so concurrent returns
+    of the same book cannot both succeed. Books with a hold queue go straight
+    to the head of the queue; the rest are freed with a second UPDATE.
+    Returns ``{book_id: user_id or None}`` for the books that had an active
+    loan, with the user each book was handed to.
+    """
+    if not book_ids:
+        return {}
+
+    loans = db.session.execute(
+        update(BorrowedBook)
+        .where(BorrowedBook.book_id.in_(list(book_ids)), BorrowedBook.returned.is_(False))
+        .values(returned=True, returned_on=date.today())
+        .returning(BorrowedBook.book_id, BorrowedBook.return_date)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not loans:
+        return {}
+    record_checkins(due for _, due in loans)
+    closed = {book_id for book_id, _ in loans}
+
+    handed_to = hand_off_to_holds(closed)
+    freed = closed - handed_to.keys()
+    if freed:
+        categories = db.session.execute(
+            update(Book)
+            .where(Book.id.in_(list(freed)))
+            .values(available=True, due_date=None, borrower_id=None)
+            .returning(Book.category)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        _adjust_available_facets(categories, 1)
+    return {book_id: handed_to.get(book_id) for book_id in closed}
+
+def checkout(book_id, user_id, due):
+    """Lend one book; returns False if it is missing or already lent."""
+    return book_id in checkout_many({book_id: (user_id, due)})
@@ -0,0 +1,111 @@
+"""Circulation statistics kept in counter tables.
+
+The loan write paths adjust the counters in the same transaction as the
+loans themselves, so the stats endpoint reads a handful of small tables
+instead of aggregating borrowed_book.
+"""
+from collections import Counter
+from datetime import date
+from sqlalchemy import select, insert, update, delete, func, union_all
+from app import db
+from app.books.facets import _UPSERT_DIALECTS
+from app.models import (Book, BorrowedBook, LoanHistory, CategoryFacet,
+                        BookLoanStat, CategoryLoanStat, LoanDueStat)
+
+def _increment(model, key, counter, deltas):
+    """Add ``deltas[k]`` to ``counter`` of the ``model`` row keyed by ``k``."""
+    deltas = {k: delta for k, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    key_column, counter_column = model.__table__.c[key], model.__table__.c[counter]
+    dialect_insert = _UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(model)
+        db.session.execute(
+            stmt.on_conflict_do_update(index_elements=[key_column],
+                                       set_={counter: counter_column + stmt.excluded[counter]}),
+            [{key: k, counter: delta} for k, delta in deltas.items()]
+        )
+        return
+
+    for k, delta in deltas.items():
+        updated = db.session.execute(
+            update(model).where(key_column == k).values({counter: counter_column + delta})
+        ).rowcount
+        if not updated:
+            db.session.add(model(**{key: k, counter: delta}))
+
+def record_checkouts(loans):
+    """Count new loans given as ``(book_id, category, due)`` tuples."""
+    loans = list(loans)
+    _increment(BookLoanStat, "book_id", "loans", Counter(book_id for book_id, _, _ in loans))
+    _increment(CategoryLoanStat, "category", "loans", Counter(category for _, category, _ in loans))
+    _increment(LoanDueStat, "due_date", "active", Counter(due for _, _, due in loans))
+
+def record_checkins(due_dates):
+    """Remove closed loans, given by their due dates, from the active counters."""
+    closed = Counter(due_dates)
+    _increment(LoanDueStat, "due_date", "active", {due: -count for due, count in closed.items()})
+    db.session.execute(delete(LoanDueStat).where(LoanDueStat.due_date.in_(list(closed)),
+                                                 LoanDueStat.active <= 0))
+
+def rebuild_loan_stats(connection):
+    """Recompute every counter from borrowed_book and borrowed_book_history."""
+    for model in (BookLoanStat, CategoryLoanStat, LoanDueStat):
+        connection.execute(delete(model))
+
+    loans = union_all(select(BorrowedBook.book_id), select(LoanHistory.book_id)).subquery()
+    connection.execute(insert(BookLoanStat).from_select(
+        ["book_id", "loans"],
+        select(loans.c.book_id, func.count()).group_by(loans.c.book_id)
+    ))
+    connection.execute(insert(CategoryLoanStat).from_select(
+        ["category", "loans"],
+        select(Book.category, func.count())
+        .select_from(loans.join(Book, Book.id == loans.c.book_id))
+        .group_by(Book.category)
+    ))
+    connection.execute(insert(LoanDueStat).from_select(
+        ["due_date", "active"],
+        select(BorrowedBook.return_date, func.count())
+        .where(BorrowedBook.returned.is_(False))
+        .group_by(BorrowedBook.return_date)
+    ))
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else 0.0
+
+def loan_stats(top=10, today=None):
+    """Dashboard figures read from the counter tables in O(number of stats)."""
+    today = today or date.today()
+    most_borrowed = db.session.execute(
+        select(BookLoanStat.book_id, Book.title, BookLoanStat.loans)
+        .join(Book, Book.id == BookLoanStat.book_id)
+        .where(BookLoanStat.loans > 0)
+        .order_by(BookLoanStat.loans.desc(), BookLoanStat.book_id)
+        .limit(top)
+    ).all()
+    by_category = db.session.execute(
+        select(CategoryLoanStat.category, CategoryLoanStat.loans)
+        .where(CategoryLoanStat.loans > 0)
+        .order_by(CategoryLoanStat.category)
+    ).all()
+    books, available = db.session.execute(
+        select(func.coalesce(func.sum(CategoryFacet.total), 0),
+               func.coalesce(func.sum(CategoryFacet.available), 0))
+    ).one()
+    active, overdue = db.session.execute(
+        select(func.coalesce(func.sum(LoanDueStat.active), 0),
+               func.coalesce(func.sum(db.case((LoanDueStat.due_date < today, LoanDueStat.active), else_=0)), 0))
+    ).one()
+
+    return {
+        "most_borrowed": [{"book_id": book_id, "title": title, "loans": count}
+                          for book_id, title, count in most_borrowed],
+        "loans_by_category": dict(by_category),
+        "total_loans": sum(count for _, count in by_category),
+        "utilization": {"books": books, "on_loan": books - available,
+                        "rate": _rate(books - available, books)},
+        "overdue": {"active_loans": active, "overdue_loans": overdue,
+                    "rate": _rate(overdue, active)}
+    }
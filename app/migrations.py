@@ -0,0 +1,160 @@
+"""Versioned schema migrations.
+
+``db.create_all()`` only creates missing tables, so changes to existing
+tables (new indexes, columns, backfills) are shipped as numbered migrations.
+The applied version is stored in the single-row ``schema_version`` table.
+Migrations must be idempotent: they may run against a database where part
+of the change already exists.
+"""
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+from app import db
+
+schema_version = db.Table(
+    "schema_version",
+    db.Column("version", db.Integer, nullable=False),
+)
+
+MIGRATIONS = []
+
+def migration(version, description):
+    """Register ``fn(connection)`` as the migration to schema ``version``."""
+    def decorator(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+def head_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def current_version(connection):
+    """Return the schema version recorded in the database (0 if never migrated)."""
+    if not inspect(connection).has_table(schema_version.name):
+        return 0
+    version = connection.execute(db.select(schema_version.c.version)).scalar()
+    return version or 0
+
+def _set_version(connection, version):
+    connection.execute(schema_version.delete())
+    connection.execute(schema_version.insert().values(version=version))
+
+def _create_indexes(connection, table, names):
+    for index in table.indexes:
+        if index.name in names:
+            index.create(connection, checkfirst=True)
+
+def _add_column_sql(dialect, column):
+    # Both names go through the dialect's quoting; "user" is reserved in PostgreSQL
+    table = dialect.identifier_preparer.format_table(column.table)
+    return f"ALTER TABLE {table} ADD COLUMN {CreateColumn(column).compile(dialect=dialect)}"
+
+def _add_columns(connection, table, names):
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    for name in names:
+        if name not in existing:
+            connection.exec_driver_sql(_add_column_sql(connection.dialect, table.c[name]))
+
+def upgrade(connection):
+    """Apply every pending migration in order; return the ones applied."""
+    schema_version.create(connection, checkfirst=True)
+    version = current_version(connection)
+    applied = []
+    for target, description, fn in MIGRATIONS:
+        if target <= version:
+            continue
+        fn(connection)
+        _set_version(connection, target)
+        applied.append((target, description))
+    return applied
+
+def create_or_upgrade():
+    """Bring the database schema up to date.
+
+    A database without tables is created from the models and stamped with
+    the latest version; an existing one gets any new tables plus its pending
+    migrations.
+    """
+    from app.models import Book
+    fresh = not inspect(db.engine).has_table(Book.__tablename__)
+    db.create_all()
+    with db.engine.begin() as connection:
+        if fresh:
+            _set_version(connection, head_version())
+            return []
+        return upgrade(connection)
+
+@migration(1, "Add indexes for hot lookup columns")
+def _add_lookup_indexes(connection):
+    from app.models import User, Book, BorrowedBook
+    _create_indexes(connection, User.__table__, {"ix_user_is_admin"})
+    _create_indexes(connection, Book.__table__, {"ix_book_available_category"})
+    _create_indexes(connection, BorrowedBook.__table__, {"ix_borrowed_book_book_returned"})
+
+@migration(2, "Backfill category facet counters")
+def _backfill_category_facets(connection):
+    from app.books.facets import rebuild_category_facets
+    rebuild_category_facets(connection)
+
+@migration(3, "Denormalize active-loan state onto book")
+def _denormalize_active_loans(connection):
+    from app.models import Book
+    from app.loans.consistency import repair_loan_state
+    _add_columns(connection, Book.__table__, ["due_date", "borrower_id"])
+    repair_loan_state(connection)
+
+@migration(4, "Enforce at most one active loan per book")
+def _unique_active_loans(connection):
+    from sqlalchemy import update, select, func
+    from sqlalchemy.orm import aliased
+    from app.models import BorrowedBook
+    from app.loans.consistency import repair_loan_state
+
+    # Close all but the most recent active loan of each book so the unique
+    # index can be built, then realign the book rows with what is left
+    latest = aliased(BorrowedBook)
+    connection.execute(
+        update(BorrowedBook)
+        .where(BorrowedBook.returned.is_(False),
+               BorrowedBook.id < select(func.max(latest.id))
+               .where(latest.book_id == BorrowedBook.book_id, latest.returned.is_(False))
+               .scalar_subquery())
+        .values(returned=True)
+    )
+    repair_loan_state(connection)
+    if connection.dialect.name in ("sqlite", "postgresql"):
+        _create_indexes(connection, BorrowedBook.__table__, {"ux_borrowed_book_active_book"})
+
+@migration(5, "Add index for the overdue loan report")
+def _add_overdue_index(connection):
+    from app.models import BorrowedBook
+    _create_indexes(connection, BorrowedBook.__table__, {"ix_borrowed_book_returned_return_date"})
+
+@migration(6, "Add covering index for per-user loan listings")
+def _add_user_loans_index(connection):
+    from app.models import BorrowedBook
+    _create_indexes(connection, BorrowedBook.__table__, {"ix_borrowed_book_user_returned_return_date"})
+
+@migration(7, "Record the return day of loans for archival")
+def _add_returned_on(connection):
+    from app.models import BorrowedBook
+    _add_columns(connection, BorrowedBook.__table__, ["returned_on"])
+
+@migration(8, "Backfill circulation statistics")
+def _backfill_loan_stats(connection):
+    from app.loans.stats import rebuild_loan_stats
+    rebuild_loan_stats(connection)
+
+@migration(9, "Add lowercase username search key")
+def _add_username_lower(connection):
+    from sqlalchemy import select, update, bindparam
+    from app.models import User
+    _add_columns(connection, User.__table__, ["username_lower"])
+    # Lowercased in Python: SQL lower() only folds ASCII on SQLite
+    rows = connection.execute(select(User.id, User.username).where(User.username_lower.is_(None))).all()
+    if rows:
+        connection.execute(
+            update(User).where(User.id == bindparam("user_id")).values(username_lower=bindparam("lowered")),
+            [{"user_id": user_id, "lowered": username.lower()} for user_id, username in rows]
+        )
+    _create_indexes(connection, User.__table__, {"ix_user_username_lower"})
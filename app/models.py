@@ -1,56 +1,114 @@
 from datetime import date
+from sqlalchemy import event, DDL
+from sqlalchemy.orm import validates
 from app import db
 
+def _lowercase_username(context):
+    return context.get_current_parameters()["username"].lower()
+
 class User(db.Model):
     __tablename__ = 'user'  # Explicitly define the table name
+    __table_args__ = (
+        db.Index('ix_user_is_admin', 'is_admin'),
+        # Case-insensitive exact and prefix search as an index range scan
+        db.Index('ix_user_username_lower', 'username_lower'),
+    )
     id            = db.Column(db.Integer, primary_key=True)
     username      = db.Column(db.String(80), unique=True, nullable=False)
+    # Search key; filled from username by Core inserts and ORM assignments
+    username_lower = db.Column(db.String(80), nullable=True, default=_lowercase_username)
     password_hash = db.Column(db.String(128), nullable=False)
     is_admin      = db.Column(db.Boolean, default=False, nullable=False)
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "username": self.username,
-            "is_admin": self.is_admin
-        }
+    # Fields exposed by to_dict, in output order
+    FIELDS = ("id", "username", "is_admin")
+
+    @validates("username")
+    def _set_username_lower(self, key, username):
+        self.username_lower = username.lower() if username is not None else None
+        return username
+
+    def to_dict(self, fields=None):
+        """Serialize the user, limited to ``fields`` when given."""
+        return {name: getattr(self, name) for name in self.FIELDS
+                if fields is None or name in fields}
+
+    @staticmethod
+    def serialize_many(users, fields=None):
+        return [u.to_dict(fields=fields) for u in users]
 
 class Book(db.Model):
     __tablename__ = 'book'  # Explicitly define the table name
+    __table_args__ = (
+        # Availability filter in search_books, with category checked on the index
+        db.Index('ix_book_available_category', 'available', 'category'),
+    )
     id        = db.Column(db.Integer, primary_key=True)
     title     = db.Column(db.String(200), nullable=False)
     author    = db.Column(db.String(120), nullable=False)
     isbn      = db.Column(db.String(20), unique=True, nullable=False)
     category  = db.Column(db.String(80), nullable=False)
     available = db.Column(db.Boolean, default=True, nullable=False)
+    # Denormalized state of the active loan, kept in step with borrowed_book
+    # by assign_book/return_book so catalog reads never join the loan table
+    due_date    = db.Column(db.Date, nullable=True)
+    borrower_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
 
-    def to_dict(self):
-        result = {
-            "id": self.id,
-            "title": self.title,
-            "author": self.author,
-            "isbn": self.isbn,
-            "category": self.category,
-            "available": self.available
-        }
+    # Fields copied from columns by to_dict, in output order
+    COLUMN_FIELDS = ("id", "title", "author", "isbn", "category", "available")
+    # Fields describing the active loan of an unavailable book
+    LOAN_FIELDS = ("due_date", "is_overdue")
+    FIELDS = COLUMN_FIELDS + LOAN_FIELDS
+
+    @classmethod
+    def wants_loan(cls, fields):
+        return fields is None or any(name in fields for name in cls.LOAN_FIELDS)
 
-        # If the book is not available, include the due date
-        if not self.available:
-            # Find the active loan for this book
-            active_loan = BorrowedBook.query.filter_by(book_id=self.id, returned=False).first()
-            if active_loan:
-                result["due_date"] = str(active_loan.return_date)
-                result["is_overdue"] = active_loan.is_overdue()
+    def is_overdue(self):
+        """Check if the book's active loan is past its due date."""
+        return self.due_date is not None and date.today() > self.due_date
+
+    def to_dict(self, fields=None):
+        """Serialize the book, limited to ``fields`` when given."""
+        result = {name: getattr(self, name) for name in self.COLUMN_FIELDS
+                  if fields is None or name in fields}
+
+        # If the book is on loan, include the due date
+        if self.wants_loan(fields) and self.due_date is not None:
+            if fields is None or "due_date" in fields:
+                result["due_date"] = str(self.due_date)
+            if fields is None or "is_overdue" in fields:
+                result["is_overdue"] = self.is_overdue()
 
         return result
 
+    @staticmethod
+    def serialize_many(books, fields=None):
+        return [b.to_dict(fields=fields) for b in books]
+
 class BorrowedBook(db.Model):
     __tablename__ = 'borrowed_book'  # Explicitly define the table name
+    __table_args__ = (
+        # Active-loan lookup by book in return_book
+        db.Index('ix_borrowed_book_book_returned', 'book_id', 'returned'),
+        # Overdue report: active loans in due-date order
+        db.Index('ix_borrowed_book_returned_return_date', 'returned', 'return_date'),
+        # Per-user loan listings; book_id makes it covering for the join
+        db.Index('ix_borrowed_book_user_returned_return_date',
+                 'user_id', 'returned', 'return_date', 'book_id'),
+        # At most one active loan per book; needs partial index support
+        db.Index('ux_borrowed_book_active_book', 'book_id', unique=True,
+                 sqlite_where=db.text('returned = 0'),
+                 postgresql_where=db.text('returned = false'))
+          .ddl_if(dialect=('sqlite', 'postgresql')),
+    )
     id          = db.Column(db.Integer, primary_key=True)
     user_id     = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     book_id     = db.Column(db.Integer, db.ForeignKey("book.id"), nullable=False)
     return_date = db.Column(db.Date, nullable=False)
     returned    = db.Column(db.Boolean, default=False, nullable=False)
+    # Day the book came back; the archival job moves loans by this date
+    returned_on = db.Column(db.Date, nullable=True)
 
     def is_overdue(self):
         """Check if the book is overdue."""
@@ -65,3 +123,93 @@ class BorrowedBook(db.Model):
             "returned": self.returned,
             "is_overdue": self.is_overdue()
         }
+
+class LoanHistory(db.Model):
+    """Returned loans moved out of borrowed_book by the archival job.
+
+    Rows keep their borrowed_book id so both tables can be read as one.
+    """
+    __tablename__ = 'borrowed_book_history'
+    __table_args__ = (
+        # Per-user loan listings, newest first
+        db.Index('ix_borrowed_book_history_user_id', 'user_id', 'id'),
+    )
+    id          = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id     = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    book_id     = db.Column(db.Integer, db.ForeignKey("book.id"), nullable=False)
+    return_date = db.Column(db.Date, nullable=False)
+    returned_on = db.Column(db.Date, nullable=True)
+
+class Hold(db.Model):
+    """A user's place in the FIFO queue for a lent-out book.
+
+    Holds are deleted when cancelled or fulfilled, so the table only holds
+    waiting users; queue order is id order within a book.
+    """
+    __tablename__ = 'hold'
+    __table_args__ = (
+        # Queue head and positions per book
+        db.Index('ix_hold_book_id', 'book_id', 'id'),
+        db.Index('ix_hold_user_id', 'user_id'),
+        # One place in a book's queue per user
+        db.UniqueConstraint('book_id', 'user_id', name='uq_hold_book_user'),
+    )
+    id      = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("book.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+
+class CategoryFacet(db.Model):
+    """Running book counts per category, maintained by the catalog write paths."""
+    __tablename__ = 'category_facet'
+    category  = db.Column(db.String(80), primary_key=True)
+    total     = db.Column(db.Integer, default=0, nullable=False)
+    available = db.Column(db.Integer, default=0, nullable=False)
+
+class BookLoanStat(db.Model):
+    """Lifetime loan count per book, maintained by the loan write paths."""
+    __tablename__ = 'book_loan_stat'
+    __table_args__ = (
+        # Most-borrowed ranking
+        db.Index('ix_book_loan_stat_loans', 'loans', 'book_id'),
+    )
+    book_id = db.Column(db.Integer, db.ForeignKey("book.id"), primary_key=True)
+    loans   = db.Column(db.Integer, default=0, nullable=False)
+
+class CategoryLoanStat(db.Model):
+    """Lifetime loan count per category, maintained by the loan write paths."""
+    __tablename__ = 'category_loan_stat'
+    category = db.Column(db.String(80), primary_key=True)
+    loans    = db.Column(db.Integer, default=0, nullable=False)
+
+class LoanDueStat(db.Model):
+    """Active loans per due date; rows before today count as overdue."""
+    __tablename__ = 'loan_due_stat'
+    due_date = db.Column(db.Date, primary_key=True)
+    active   = db.Column(db.Integer, default=0, nullable=False)
+
+class RevokedToken(db.Model):
+    """JWT ids revoked by logout or refresh-token rotation.
+
+    Workers read new rows by id to keep their in-memory revocation sets
+    current; rows can be pruned once the token has expired, except the
+    newest, which keeps SQLite from reusing ids workers have seen.
+    """
+    __tablename__ = 'revoked_token'
+    __table_args__ = (
+        db.Index('ix_revoked_token_expires_at', 'expires_at'),
+    )
+    id         = db.Column(db.Integer, primary_key=True)
+    jti        = db.Column(db.String(36), unique=True, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+class CatalogVersion(db.Model):
+    """Single-row counter bumped by every write that changes the catalog."""
+    __tablename__ = 'catalog_version'
+    id      = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+event.listen(
+    CatalogVersion.__table__,
+    "after_create",
+    DDL("INSERT INTO catalog_version (id, version) VALUES (1, 0)")
+)
@@ -0,0 +1,93 @@
+from flask import request, jsonify
+from app.streaming import stream_requested, ndjson_response, csv_requested, csv_response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Swagger parameter definitions shared by the paginated list endpoints
+PAGINATION_PARAMETERS = [
+    {
+        'name': 'limit',
+        'in': 'query',
+        'type': 'integer',
+        'required': False,
+        'description': f'Page size (1-{MAX_PAGE_SIZE}, default {DEFAULT_PAGE_SIZE}); enables pagination'
+    },
+    {
+        'name': 'after',
+        'in': 'query',
+        'type': 'string',
+        'required': False,
+        'description': 'Cursor returned as next_cursor by the previous page'
+    }
+]
+
+def pagination_requested():
+    """Return True when the client asked for a paginated response."""
+    return 'limit' in request.args or 'after' in request.args
+
+def parse_page_args():
+    """Read and validate the limit/after query parameters.
+
+    Raises ValueError with a client-facing message on bad input.
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    after = request.args.get('after')
+    if after is not None:
+        try:
+            after = int(after)
+        except ValueError:
+            raise ValueError("Invalid cursor")
+    return limit, after
+
+def keyset_page(query, key_column, limit, after=None, descending=False):
+    """Fetch one page of ``query`` ordered by ``key_column``.
+
+    Seeks past ``after`` with a range condition on the key instead of an
+    OFFSET, so every page costs one index seek regardless of its depth. Any
+    existing ordering is replaced, since the cursor is only valid in key order.
+    Returns the rows and the cursor for the next page (None on the last page).
+    """
+    if after is not None:
+        query = query.filter(key_column < after if descending else key_column > after)
+    order = key_column.desc() if descending else key_column
+    rows = query.order_by(None).order_by(order).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, str(getattr(rows[-1], key_column.key))
+
+def list_response(query, key_column, serialize, csv_columns=None, csv_filename="export.csv"):
+    """Respond with every row of ``query``, or with one keyset page on request.
+
+    Without pagination parameters the legacy plain JSON array is returned;
+    with them the body is ``{"items": [...], "next_cursor": ...}``. Streaming
+    clients get every row as NDJSON in key order instead, and endpoints that
+    pass ``csv_columns`` can also stream it as a CSV export.
+    """
+    if csv_columns and csv_requested():
+        return csv_response(query.order_by(key_column), serialize, csv_columns, csv_filename)
+
+    if stream_requested():
+        return ndjson_response(query.order_by(key_column), serialize)
+
+    if not pagination_requested():
+        return jsonify(serialize(query.all()))
+
+    return page_response(query, key_column, serialize)
+
+def page_response(query, key_column, serialize, descending=False):
+    """Respond with one keyset page: ``{"items": [...], "next_cursor": ...}``."""
+    try:
+        limit, after = parse_page_args()
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    rows, next_cursor = keyset_page(query, key_column, limit, after, descending)
+    return jsonify({"items": serialize(rows), "next_cursor": next_cursor})
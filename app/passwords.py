@@ -0,0 +1,94 @@
+"""Password hashing and verification on a bounded process pool.
+
+bcrypt is deliberately CPU-bound. Running it on a pool of
+``PASSWORD_HASH_WORKERS`` processes caps how many hashes run at once, so a
+burst of logins queues behind the pool instead of taking every core from
+the catalog requests served by the other threads. With 0 workers hashing
+runs inline on the request thread.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+import bcrypt
+from flask import current_app
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+def _verify(password, pw_hash):
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), pw_hash.encode("utf-8"))
+    except ValueError:
+        # Malformed stored hash
+        return False
+
+def _executor():
+    global _pool
+    workers = current_app.config["PASSWORD_HASH_WORKERS"]
+    if not workers:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the parent runs request threads
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def _run(fn, *args):
+    pool = _executor()
+    if pool is None:
+        return fn(*args)
+    return pool.submit(fn, *args).result()
+
+def hash_password(password):
+    """Hash ``password`` at the configured ``BCRYPT_LOG_ROUNDS``."""
+    return _run(_hash, password, current_app.config["BCRYPT_LOG_ROUNDS"])
+
+def check_password(pw_hash, password):
+    """Return True if ``password`` matches the stored bcrypt hash."""
+    return _run(_verify, password, pw_hash)
+
+@contextmanager
+def bulk_hasher(workers=None):
+    """Yield ``hash_all(passwords)`` backed by a pool of ``workers`` processes.
+
+    Meant for imports, which may use every core: ``workers`` defaults to
+    ``BULK_HASH_WORKERS``, or the CPU count when that is 0. The pool lives for
+    the ``with`` block so its start-up cost is paid once per import.
+    """
+    rounds = current_app.config["BCRYPT_LOG_ROUNDS"]
+    workers = workers or current_app.config["BULK_HASH_WORKERS"] or os.cpu_count() or 1
+    if workers == 1:
+        yield lambda passwords: [_hash(password, rounds) for password in passwords]
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        def hash_all(passwords):
+            chunksize = max(1, len(passwords) // (workers * 4))
+            return list(pool.map(_hash, passwords, repeat(rounds), chunksize=chunksize))
+        yield hash_all
+
+def hash_rounds(pw_hash):
+    """Work factor encoded in a bcrypt hash (``$2b$12$...``), or None."""
+    try:
+        return int(pw_hash.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+def needs_rehash(pw_hash):
+    """True when ``pw_hash`` was made with a cost other than the configured one."""
+    return hash_rounds(pw_hash) != current_app.config["BCRYPT_LOG_ROUNDS"]
+
+def shutdown():
+    """Stop the worker processes, if any were started."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,119 @@
+import re
+from flask import current_app
+from sqlalchemy import event, text, literal_column, table, column, or_, and_
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models import Book
+
+FTS_TABLE = "book_fts"
+
+# External-content FTS5 index over the searchable book columns. The triggers
+# keep it in sync with every insert, update and delete on the book table.
+_FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, author, category, content='book', content_rowid='id'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS book_fts_ai AFTER INSERT ON book BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, author, category)
+        VALUES (new.id, new.title, new.author, new.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS book_fts_ad AFTER DELETE ON book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, category)
+        VALUES ('delete', old.id, old.title, old.author, old.category);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS book_fts_au AFTER UPDATE OF title, author, category ON book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, category)
+        VALUES ('delete', old.id, old.title, old.author, old.category);
+        INSERT INTO {FTS_TABLE}(rowid, title, author, category)
+        VALUES (new.id, new.title, new.author, new.category);
+    END""",
+]
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+
+def table_exists(connection, name):
+    """True when SQLite has a table (virtual ones included) called ``name``."""
+    if connection.dialect.name != "sqlite":
+        return False
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": name}
+    ).first() is not None
+
+def install_fulltext_index(connection):
+    """Create the FTS5 index and its sync triggers if they are missing.
+
+    Returns True when the index is usable. Databases other than SQLite, and
+    SQLite builds without FTS5, return False and searches fall back to LIKE.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+
+    exists = table_exists(connection, FTS_TABLE)
+    try:
+        for statement in _FTS_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            # Index rows that predate the FTS table
+            connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    except OperationalError:
+        return False
+    return True
+
+@event.listens_for(Book.__table__, "after_create")
+def _create_fulltext_index(target, connection, **kw):
+    install_fulltext_index(connection)
+
+@event.listens_for(Book.__table__, "before_drop")
+def _drop_fulltext_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+
+def index_available(extension, name):
+    """Whether search index table ``name`` exists.
+
+    Looked up once, on the app's first search, and kept in
+    ``app.extensions[extension]``; ``flask init-db`` sets it directly.
+    """
+    available = current_app.extensions.get(extension)
+    if available is None:
+        available = current_app.extensions[extension] = table_exists(db.session.connection(), name)
+    return available
+
+def fulltext_enabled():
+    return index_available("fulltext_search", FTS_TABLE)
+
+def parse_terms(q):
+    """Split a free-text query into lowercase word terms."""
+    return re.findall(r"\w+", q.lower())
+
+def apply_fulltext_search(query, q):
+    """Restrict ``query`` to books matching every term of ``q``.
+
+    With the FTS5 index each term is a prefix match against title, author or
+    category and results are ordered by bm25 relevance. Without it each term
+    is matched as a substring with ILIKE and no ranking is applied.
+    """
+    terms = parse_terms(q)
+    if not terms:
+        return query.filter(False)
+
+    if fulltext_enabled():
+        # Quote each term so user input cannot inject FTS5 query syntax
+        match = " ".join(f'"{term}"*' for term in terms)
+        return (query
+                .join(_fts, _fts.c.rowid == Book.id)
+                .filter(literal_column(FTS_TABLE).op("MATCH")(match))
+                .order_by(_fts.c.rank))
+
+    return query.filter(and_(*[
+        or_(Book.title.ilike(f"%{term}%"),
+            Book.author.ilike(f"%{term}%"),
+            Book.category.ilike(f"%{term}%"))
+        for term in terms
+    ]))
+
+def init_db(app):
+    """Install the full-text index for ``app``'s database (run by ``flask init-db``)."""
+    with db.engine.begin() as connection:
+        app.extensions["fulltext_search"] = install_fulltext_index(connection)
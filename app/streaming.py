@@ -0,0 +1,79 @@
+import csv
+import io
+from flask import request, current_app, Response, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+CSV_MIMETYPE = "text/csv"
+
+# Rows fetched from the database cursor per round-trip while streaming
+STREAM_BATCH_SIZE = 1000
+
+# Swagger parameter definitions shared by the streamable list endpoints
+STREAM_PARAMETERS = [
+    {
+        'name': 'stream',
+        'in': 'query',
+        'type': 'boolean',
+        'required': False,
+        'description': f'Stream results as {NDJSON_MIMETYPE} (also selected by the Accept header)'
+    }
+]
+
+def stream_requested():
+    """Return True when the client asked for an NDJSON stream."""
+    if request.args.get('stream', '').lower() in ('true', '1', 't'):
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+def csv_requested():
+    """Return True when the client asked for a CSV export."""
+    if request.args.get('format', '').lower() == 'csv':
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", CSV_MIMETYPE])
+    return best == CSV_MIMETYPE
+
+def _batched_items(query, serialize, batch_size):
+    batch = []
+    for row in query.yield_per(batch_size):
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield from serialize(batch)
+            batch = []
+    yield from serialize(batch)
+
+def csv_response(query, serialize, columns, filename, batch_size=STREAM_BATCH_SIZE):
+    """Stream ``query`` as CSV with a header row of ``columns``.
+
+    Rows are read and serialized batch by batch as in ``ndjson_response``.
+    """
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for item in _batched_items(query, serialize, batch_size):
+            writer.writerow(item)
+            if buffer.tell() >= 64 * 1024:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(stream_with_context(generate()), mimetype=CSV_MIMETYPE, headers={
+        "Content-Disposition": f"attachment; filename={filename}"
+    })
+
+def ndjson_response(query, serialize, batch_size=STREAM_BATCH_SIZE):
+    """Stream ``query`` as newline-delimited JSON, one object per row.
+
+    Rows are pulled from the cursor ``batch_size`` at a time with
+    ``yield_per`` and serialized batch by batch, so memory stays flat and the
+    first line is sent before the rest of the table has been read.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        for item in _batched_items(query, serialize, batch_size):
+            yield dumps(item) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,37 @@
+from app.models import User
+from app.bulk import DEFAULT_CHUNK_SIZE, RowError, import_rows
+from app.passwords import bulk_hasher
+
+USER_FIELDS = ("username", "password")
+
+def _parse_is_admin(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("true", "1", "t", "yes")
+
+def _validate(record):
+    username = str(record.get("username") or "").strip()
+    password = record.get("password")
+    password = password if isinstance(password, str) else ""
+    missing = [field for field, value in zip(USER_FIELDS, (username, password)) if not value]
+    if missing:
+        raise RowError(f"Missing fields: {', '.join(missing)}", username or None)
+    if len(username) > User.username.type.length:
+        raise RowError("Username too long", username)
+    return {"username": username, "password": password, "is_admin": _parse_is_admin(record.get("is_admin"))}
+
+def import_users(stream, fmt, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """Import users from a CSV or NDJSON stream in chunked transactions.
+
+    See ``app.bulk.import_rows``; rows are keyed by username. Only rows that
+    pass validation and the existing-username check are hashed, spread over a
+    pool of ``workers`` processes (see ``bulk_hasher``).
+    """
+    with bulk_hasher(workers) as hash_all:
+        def hash_passwords(rows):
+            hashes = hash_all([values["password"] for values in rows])
+            return [{"username": values["username"], "password_hash": pw_hash, "is_admin": values["is_admin"]}
+                    for values, pw_hash in zip(rows, hashes)]
+
+        return import_rows(stream, fmt, User, "username", "username", _validate, chunk_size=chunk_size,
+                           prepare=hash_passwords)
@@ -1,20 +1,36 @@
+from functools import partial
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from flasgger import swag_from
+from app.apidocs import swag_from
 from app.decorators import admin_required
 from app.models import User
-from app import db, bcrypt
+from app.pagination import PAGINATION_PARAMETERS, list_response
+from app.streaming import STREAM_PARAMETERS
+from app.passwords import hash_password
+from app.bulk import BULK_FORMATS, detect_format
+from app.users.importer import import_users
+from app.users.search import (SEARCH_PARAMETERS, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT,
+                              apply_username_search, parse_search_limit)
+from app.loans.history import ACTIVE_PARAMETER, user_loans_response
+from app.fields import FIELDS_PARAMETER, requested_fields, project_columns
+from app import db
 
 users_bp = Blueprint("users", __name__, url_prefix="/api/users")
 
+def _select_fields(query):
+    """Apply ?fields= to a user query; return the query and its serializer."""
+    fields = requested_fields(User.FIELDS)
+    return project_columns(query, User, fields), partial(User.serialize_many, fields=fields)
+
 @users_bp.route("", methods=["GET"])
 @jwt_required()
 @admin_required
 @swag_from({
     'tags': ['Users'],
+    'parameters': [FIELDS_PARAMETER] + PAGINATION_PARAMETERS + STREAM_PARAMETERS,
     'responses': {
         200: {
-            'description': 'List of users',
+            'description': 'List of users (or {items, next_cursor} when paginated, NDJSON when streamed)',
             'schema': {
                 'type': 'array',
                 'items': {'$ref': '#/definitions/User'}
@@ -24,9 +40,12 @@ users_bp = Blueprint("users", __name__, url_prefix="/api/users")
     }
 })
 def list_users():
-    """Retrieve all users."""
-    users = User.query.all()
-    return jsonify([u.to_dict() for u in users])
+    """Retrieve all users, optionally one keyset page at a time."""
+    try:
+        query, serialize = _select_fields(User.query)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    return list_response(query, User.id, serialize)
 
 @users_bp.route("", methods=["POST"])
 @jwt_required()
@@ -63,16 +82,53 @@ def add_user():
     if User.query.filter_by(username=data.get("username")).first():
         return jsonify({"msg": "Username already exists"}), 400
 
-    pw_hash = bcrypt.generate_password_hash(data.get("password", "")).decode()
     user = User(
         username=data["username"],
-        password_hash=pw_hash,
+        password_hash=hash_password(data.get("password", "")),
         is_admin=bool(data.get("is_admin", False))
     )
     db.session.add(user)
     db.session.commit()
     return jsonify(user.to_dict()), 201
 
+@users_bp.route("/bulk", methods=["POST"])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Users'],
+    'consumes': ['text/csv', 'application/x-ndjson'],
+    'parameters': [
+        {
+            'in': 'body',
+            'name': 'users',
+            'required': True,
+            'description': 'CSV with a username,password[,is_admin] header, or one JSON user object per line',
+            'schema': {'type': 'string'}
+        },
+        {
+            'name': 'format',
+            'in': 'query',
+            'type': 'string',
+            'enum': list(BULK_FORMATS),
+            'required': False,
+            'description': 'Input format; defaults to the Content-Type (NDJSON if unrecognized)'
+        }
+    ],
+    'responses': {
+        200: {'description': 'Import report with inserted/failed counts, per-row errors and rows per second'},
+        400: {'description': 'Unsupported format'},
+        403: {'description': 'Admin privilege required'}
+    }
+})
+def bulk_import_users():
+    """Create many users from a streamed CSV or NDJSON request body."""
+    fmt = request.args.get("format") or detect_format(request.content_type)
+    if fmt not in BULK_FORMATS:
+        return jsonify({"msg": f"Unsupported format: {fmt}"}), 400
+
+    report = import_users(request.stream, fmt)
+    return jsonify(report), 200
+
 @users_bp.route("/search", methods=["GET"])
 @jwt_required()
 @admin_required
@@ -84,7 +140,10 @@ def add_user():
             'in': 'query',
             'type': 'string',
             'required': False,
-            'description': 'Username to search for (partial match)'
+            'description': 'Case-insensitive username prefix (or substring with match=contains). '
+                           'Results are ranked exact match first and capped by limit '
+                           f'(1-{MAX_SEARCH_LIMIT}, default {DEFAULT_SEARCH_LIMIT}) instead of '
+                           'paginated; after is rejected'
         },
         {
             'name': 'is_admin',
@@ -93,15 +152,16 @@ def add_user():
             'required': False,
             'description': 'Filter by admin status'
         }
-    ],
+    ] + SEARCH_PARAMETERS + [FIELDS_PARAMETER] + PAGINATION_PARAMETERS + STREAM_PARAMETERS,
     'responses': {
         200: {
-            'description': 'List of matching users',
+            'description': 'List of matching users (or {items, next_cursor} when paginated, NDJSON when streamed)',
             'schema': {
                 'type': 'array',
                 'items': {'$ref': '#/definitions/User'}
             }
         },
+        400: {'description': 'Invalid match, limit or fields'},
         403: {'description': 'Admin privilege required'}
     }
 })
@@ -109,13 +169,44 @@ def search_users():
     """Search for users by username."""
     query = User.query
 
-    # Apply filters based on query parameters
-    if request.args.get('username'):
-        query = query.filter(User.username.ilike(f'%{request.args.get("username")}%'))
-
     if 'is_admin' in request.args:
         is_admin = request.args.get('is_admin').lower() in ('true', '1', 't')
         query = query.filter(User.is_admin == is_admin)
 
-    users = query.all()
-    return jsonify([u.to_dict() for u in users])
+    try:
+        query, serialize = _select_fields(query)
+        username = request.args.get('username')
+        if username:
+            # Ranked typeahead: best matches first, capped rather than paginated
+            query = apply_username_search(query, username, request.args.get('match', 'prefix'))
+            return jsonify(serialize(query.limit(parse_search_limit(request.args)).all()))
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    return list_response(query, User.id, serialize)
+
+@users_bp.route("/<int:user_id>/loans", methods=["GET"])
+@jwt_required()
+@admin_required
+@swag_from({
+    'tags': ['Users'],
+    'parameters': [
+        {
+            'in': 'path',
+            'name': 'user_id',
+            'type': 'integer',
+            'required': True,
+            'description': 'ID of the user'
+        },
+        ACTIVE_PARAMETER
+    ] + PAGINATION_PARAMETERS,
+    'responses': {
+        200: {'description': 'One page of the user\'s loans with book titles, newest first: {items, next_cursor}'},
+        403: {'description': 'Admin privilege required'},
+        404: {'description': 'User not found'}
+    }
+})
+def list_user_loans(user_id):
+    """List a user's loans."""
+    if db.session.get(User, user_id) is None:
+        return jsonify({"msg": "User not found"}), 404
+    return user_loans_response(user_id)
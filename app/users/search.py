@@ -0,0 +1,146 @@
+"""Ranked, case-insensitive username search for admin typeahead.
+
+Prefix search is a range scan on the ``username_lower`` index, read in
+index order so exact matches come first and LIMIT stops the scan early.
+Substring ("contains") search goes through the matcher named by
+``USER_SUBSTRING_SEARCH``:
+
+- ``like``: ``LIKE '%term%'`` on ``username_lower``; scans the table
+- ``trigram``: SQLite FTS5 trigram index over ``username_lower``, kept in
+  sync by triggers; terms shorter than three characters fall back to LIKE
+"""
+from flask import current_app
+from sqlalchemy import event, text, select, literal_column, table, column, case
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models import User
+from app.search import table_exists, index_available
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+MATCH_MODES = ("prefix", "contains")
+
+TRIGRAM_TABLE = "user_trigram"
+
+_TRIGRAM_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TRIGRAM_TABLE} USING fts5(
+        username_lower, content='user', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS user_trigram_ai AFTER INSERT ON user BEGIN
+        INSERT INTO {TRIGRAM_TABLE}(rowid, username_lower) VALUES (new.id, new.username_lower);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS user_trigram_ad AFTER DELETE ON user BEGIN
+        INSERT INTO {TRIGRAM_TABLE}({TRIGRAM_TABLE}, rowid, username_lower)
+        VALUES ('delete', old.id, old.username_lower);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS user_trigram_au AFTER UPDATE OF username_lower ON user BEGIN
+        INSERT INTO {TRIGRAM_TABLE}({TRIGRAM_TABLE}, rowid, username_lower)
+        VALUES ('delete', old.id, old.username_lower);
+        INSERT INTO {TRIGRAM_TABLE}(rowid, username_lower) VALUES (new.id, new.username_lower);
+    END""",
+]
+
+_trigram = table(TRIGRAM_TABLE, column("rowid"))
+
+SEARCH_PARAMETERS = [
+    {
+        'name': 'match',
+        'in': 'query',
+        'type': 'string',
+        'enum': list(MATCH_MODES),
+        'default': 'prefix',
+        'required': False,
+        'description': 'prefix (index range scan) or contains (substring) match on username'
+    }
+]
+
+def install_trigram_index(connection):
+    """Create the trigram index and its triggers if missing; True when usable."""
+    if connection.dialect.name != "sqlite":
+        return False
+    exists = table_exists(connection, TRIGRAM_TABLE)
+    try:
+        for statement in _TRIGRAM_DDL:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text(f"INSERT INTO {TRIGRAM_TABLE}({TRIGRAM_TABLE}) VALUES ('rebuild')"))
+    except OperationalError:
+        # SQLite older than 3.34 has no trigram tokenizer
+        return False
+    return True
+
+@event.listens_for(User.__table__, "before_drop")
+def _drop_trigram_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {TRIGRAM_TABLE}"))
+
+def _escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _like_contains(query, term):
+    return query.filter(User.username_lower.like(f"%{_escape_like(term)}%", escape="\\"))
+
+def _trigram_contains(query, term):
+    if len(term) < 3 or not index_available("user_trigram_search", TRIGRAM_TABLE):
+        return _like_contains(query, term)
+    match = '"' + term.replace('"', '""') + '"'
+    return query.filter(User.id.in_(
+        select(_trigram.c.rowid).where(literal_column(TRIGRAM_TABLE).op("MATCH")(match))
+    ))
+
+SUBSTRING_MATCHERS = {
+    "like": _like_contains,
+    "trigram": _trigram_contains,
+}
+
+def _prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+def apply_username_search(query, term, mode="prefix"):
+    """Restrict ``query`` to users matching ``term`` and rank the results.
+
+    Raises ValueError for an unknown ``mode``.
+    """
+    if mode not in MATCH_MODES:
+        raise ValueError(f"match must be one of: {', '.join(MATCH_MODES)}")
+    term = term.lower()
+    if mode == "prefix":
+        # Range on the index; its order already puts an exact match first
+        return (query
+                .filter(User.username_lower >= term, User.username_lower < _prefix_upper_bound(term))
+                .order_by(User.username_lower, User.id))
+
+    matcher = SUBSTRING_MATCHERS[current_app.config["USER_SUBSTRING_SEARCH"]]
+    starts_with = (User.username_lower >= term) & (User.username_lower < _prefix_upper_bound(term))
+    return (matcher(query, term)
+            .order_by(case((starts_with, 0), else_=1), User.username_lower, User.id))
+
+def parse_search_limit(args):
+    """Read ?limit= for a ranked search; raises ValueError on bad input.
+
+    Ranked results are capped rather than paginated, so ?after= is rejected.
+    """
+    if "after" in args:
+        raise ValueError("after cannot be combined with username; narrow the search instead")
+    try:
+        limit = int(args.get("limit", DEFAULT_SEARCH_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if not 1 <= limit <= MAX_SEARCH_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_SEARCH_LIMIT}")
+    return limit
+
+def init_app(app):
+    """Check the configured substring matcher; the index itself is built by ``init_db``."""
+    if app.config["USER_SUBSTRING_SEARCH"] not in SUBSTRING_MATCHERS:
+        raise RuntimeError(f"USER_SUBSTRING_SEARCH must be one of: {', '.join(SUBSTRING_MATCHERS)}")
+
+def init_db(app):
+    """Install the trigram index when it is the configured substring matcher."""
+    enabled = False
+    if app.config["USER_SUBSTRING_SEARCH"] == "trigram":
+        with db.engine.begin() as connection:
+            enabled = install_trigram_index(connection)
+    app.extensions["user_trigram_search"] = enabled
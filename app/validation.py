@@ -0,0 +1,3 @@
+def is_id(value):
+    """True for a JSON integer id; JSON true/false arrive as bool, an int subclass."""
+    return isinstance(value, int) and not isinstance(value, bool)
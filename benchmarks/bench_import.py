@@ -0,0 +1,53 @@
+"""Measure bulk catalog import throughput against the one-book-per-request path.
+
+Usage: python benchmarks/bench_import.py [--books 200000] [--baseline 2000]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def make_csv(count, prefix):
+    lines = ["title,author,isbn,category"]
+    lines.extend(f"Title {i},Author {i % 5000},{prefix}-{i},Category {i % 40}" for i in range(count))
+    return io.BytesIO("\n".join(lines).encode())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=200_000)
+    parser.add_argument("--baseline", type=int, default=2000,
+                        help="rows to insert through the per-row add_book path")
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URI"] = f"sqlite:///{db_path}"
+
+    from app import create_app, db
+    from app.bootstrap import init_db
+    from app.models import Book
+    from app.books.importer import import_books, DEFAULT_CHUNK_SIZE
+
+    app = create_app({"CATALOG_CACHE_ENABLED": False})
+    with app.app_context():
+        init_db()
+        start = time.perf_counter()
+        for i in range(args.baseline):
+            isbn = f"single-{i}"
+            if not Book.query.filter_by(isbn=isbn).first():
+                db.session.add(Book(title=f"Title {i}", author="Author", isbn=isbn, category="Category"))
+                db.session.commit()
+        elapsed = time.perf_counter() - start
+        print(f"per-row: {args.baseline} rows in {elapsed:.2f}s ({args.baseline / elapsed:,.0f} rows/s)")
+
+        report = import_books(make_csv(args.books, "bulk"), "csv",
+                              chunk_size=args.chunk_size or DEFAULT_CHUNK_SIZE)
+        print(f"bulk:    {report['inserted']} rows in {report['elapsed_seconds']:.2f}s "
+              f"({report['rows_per_second']:,} rows/s)")
+
+if __name__ == "__main__":
+    main()
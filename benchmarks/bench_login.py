@@ -0,0 +1,87 @@
+"""Measure login throughput and catalog read latency during a login burst.
+
+Logins are sent from ``--threads`` threads (waitress runs four) while one
+extra thread reads the catalog; each run is repeated with hashing inline on
+the request threads and on the password process pool.
+
+Usage: python benchmarks/bench_login.py [--logins 64] [--threads 4] [--rounds 12] [--workers 2]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def run(app, logins, threads):
+    from app import passwords
+
+    done = threading.Event()
+    read_latencies = []
+
+    def reader():
+        client = app.test_client()
+        while not done.is_set():
+            start = time.perf_counter()
+            client.get("/api/books?limit=20")
+            read_latencies.append(time.perf_counter() - start)
+
+    def login_worker(count):
+        client = app.test_client()
+        for _ in range(count):
+            res = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+            assert res.status_code == 200, res.get_json()
+
+    # Warm the pool so process start-up is not timed
+    with app.app_context():
+        passwords.check_password(passwords.hash_password("warm-up"), "warm-up")
+
+    read_thread = threading.Thread(target=reader)
+    read_thread.start()
+    workers = [threading.Thread(target=login_worker, args=(logins // threads,)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    read_thread.join()
+    passwords.shutdown()
+
+    total = logins // threads * threads
+    latencies = sorted(read_latencies)
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    return total / elapsed, statistics.median(latencies) if latencies else 0, p95, len(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ.setdefault("APP_ENV", "production")
+    from app import create_app
+    from app.bootstrap import init_db
+
+    print(f"{os.cpu_count()} CPUs, bcrypt cost {args.rounds}, {args.threads} login threads")
+    for label, workers in (("inline", 0), (f"pool({args.workers})", args.workers)):
+        app = create_app({
+            "BCRYPT_LOG_ROUNDS": args.rounds,
+            "PASSWORD_HASH_WORKERS": workers,
+            "CATALOG_CACHE_ENABLED": False,
+        })
+        with app.app_context():
+            init_db()
+        rate, p50, p95, reads = run(app, args.logins, args.threads)
+        print(f"{label:>10}: {rate:6.1f} logins/s | catalog reads during burst: "
+              f"{reads} reads, p50 {p50 * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Measure the per-request cost of the token revocation check.
+
+Seeds ``--revoked`` unexpired revoked tokens, then times the in-memory
+lookup on its own and the full ``verify_jwt_in_request`` with and without
+the blocklist callback (best of five runs each).
+
+Usage: python benchmarks/bench_revocation.py [--revoked 100000] [--iterations 20000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def per_call_us(fn, iterations, repeat=5):
+    """Best per-call time of ``repeat`` runs, in microseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--revoked", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    from flask_jwt_extended import create_access_token, verify_jwt_in_request
+    from app import create_app, db, jwt
+    from app.bootstrap import init_db
+    from app.models import RevokedToken
+    from app.auth.revocation import get_revocation_list
+
+    app = create_app({"CATALOG_CACHE_ENABLED": False})
+    with app.app_context():
+        init_db()
+        expires_at = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=1)
+        db.session.execute(db.insert(RevokedToken), [
+            {"jti": str(uuid.uuid4()), "expires_at": expires_at} for _ in range(args.revoked)
+        ])
+        db.session.commit()
+        token = create_access_token(identity="1")
+
+        revocations = get_revocation_list()
+        start = time.perf_counter()
+        revocations.sync()
+        print(f"initial sync of {args.revoked:,} revoked tokens: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        revoked_jti = db.session.execute(db.select(RevokedToken.jti).limit(1)).scalar()
+        print(f"is_revoked (revoked jti):   {per_call_us(lambda: revocations.is_revoked(revoked_jti), args.iterations):.2f} us")
+        print(f"is_revoked (valid jti):     {per_call_us(lambda: revocations.is_revoked('valid'), args.iterations):.2f} us")
+
+        verify = lambda: verify_jwt_in_request()
+        with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+            with_check = per_call_us(verify, args.iterations)
+            callback = jwt._token_in_blocklist_callback
+            jwt._token_in_blocklist_callback = lambda header, payload: False
+            without_check = per_call_us(verify, args.iterations)
+            jwt._token_in_blocklist_callback = callback
+        print(f"verify_jwt_in_request:      {with_check:.2f} us with the check, "
+              f"{without_check:.2f} us without ({with_check - without_check:+.2f} us)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare FTS5 and ILIKE book search on a large synthetic catalog.
+
+Usage: python benchmarks/bench_search.py [--books 100000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def make_words(rng, count):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(5, 9))) for _ in range(count)]
+
+def timed(fn, terms):
+    samples = []
+    for term in terms:
+        start = time.perf_counter()
+        fn(term)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URI"] = f"sqlite:///{db_path}"
+
+    from sqlalchemy import insert, or_
+    from app import create_app, db
+    from app.bootstrap import init_db
+    from app.models import Book
+    from app.search import apply_fulltext_search
+
+    app = create_app()
+    rng = random.Random(42)
+    words = make_words(rng, 5000)
+
+    with app.app_context():
+        init_db()
+        start = time.perf_counter()
+        rows = [{
+            "title": " ".join(rng.sample(words, 3)).title(),
+            "author": " ".join(rng.sample(words, 2)).title(),
+            "isbn": f"bench-{i}",
+            "category": rng.choice(words[:50]),
+            "available": True,
+        } for i in range(args.books)]
+        db.session.execute(insert(Book), rows)
+        db.session.commit()
+        print(f"loaded {args.books} books in {time.perf_counter() - start:.1f}s")
+
+        terms = [rng.choice(words) for _ in range(args.queries)]
+
+        def ilike_search(term):
+            pattern = f"%{term}%"
+            return Book.query.filter(or_(Book.title.ilike(pattern),
+                                         Book.author.ilike(pattern),
+                                         Book.category.ilike(pattern))).all()
+
+        def fulltext_search(term):
+            return apply_fulltext_search(Book.query, term).all()
+
+        for name, fn in (("ilike", ilike_search), ("fts5", fulltext_search)):
+            mean, p50, p95 = timed(fn, terms)
+            print(f"{name:>6}: mean {mean:8.2f} ms   p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Measure worker start-up: importing the app package plus ``create_app()``.
+
+Each sample runs in a fresh interpreter so module imports are cold, as
+they are for a new gunicorn worker. The database is initialized once with
+``flask init-db`` beforehand and is not touched by ``create_app``.
+
+Usage: python benchmarks/bench_startup.py [--runs 10]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE = """
+import time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+created = time.perf_counter()
+print((imported - start) * 1e3, (created - imported) * 1e3)
+"""
+
+def sample(env):
+    out = subprocess.run([sys.executable, "-c", SAMPLE], cwd=ROOT, env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return [float(value) for value in out.split()]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ, DATABASE_URI=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    subprocess.run([sys.executable, "-m", "flask", "--app", "application", "init-db"],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+
+    print(f"{'setup':>22} | {'import':>9} | {'create_app':>10} | total (median of {args.runs})")
+    for label, overrides in (("development", {"APP_ENV": "development"}),
+                             ("production", {"APP_ENV": "production"}),
+                             ("production + swagger", {"APP_ENV": "production", "SWAGGER_ENABLED": "true"})):
+        runs = [sample({**env, **overrides}) for _ in range(args.runs)]
+        imported = statistics.median(run[0] for run in runs)
+        created = statistics.median(run[1] for run in runs)
+        print(f"{label:>22} | {imported:6.1f} ms | {created:7.1f} ms | {imported + created:6.1f} ms")
+
+if __name__ == "__main__":
+    main()
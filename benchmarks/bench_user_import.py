@@ -0,0 +1,48 @@
+"""Measure bulk user import throughput as hashing processes are added.
+
+Usage: python benchmarks/bench_user_import.py [--users 2000] [--rounds 12] [--workers 1,2,4]
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def make_csv(count, prefix):
+    lines = ["username,password"]
+    lines.extend(f"{prefix}-{i},password-{i}" for i in range(count))
+    return io.BytesIO("\n".join(lines).encode())
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, max(1, cores // 2), cores})),
+                        help="comma-separated process counts to try")
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    from app import create_app
+    from app.bootstrap import init_db
+    from app.users.importer import import_users
+
+    app = create_app({"BCRYPT_LOG_ROUNDS": args.rounds, "CATALOG_CACHE_ENABLED": False})
+    print(f"{cores} CPUs, bcrypt cost {args.rounds}, {args.users} users per run")
+    baseline = None
+    with app.app_context():
+        init_db()
+        for workers in (int(n) for n in args.workers.split(",")):
+            start = time.perf_counter()
+            report = import_users(make_csv(args.users, f"w{workers}"), "csv", workers=workers)
+            elapsed = time.perf_counter() - start
+            assert report["inserted"] == args.users, report["errors"][:5]
+            baseline = baseline or elapsed
+            print(f"{workers:>3} workers: {elapsed:7.2f}s ({args.users / elapsed:7.1f} users/s, "
+                  f"{baseline / elapsed:.2f}x)")
+
+if __name__ == "__main__":
+    main()
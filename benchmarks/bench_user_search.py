@@ -0,0 +1,61 @@
+"""Compare username search strategies over a large user table.
+
+Times the old unindexed ``ILIKE '%term%'`` filter against the indexed
+prefix range scan and both substring matchers (LIKE and FTS5 trigram).
+
+Usage: python benchmarks/bench_user_search.py [--users 200000] [--iterations 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def per_call_ms(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URI"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    from sqlalchemy import insert
+    from app import create_app, db
+    from app.bootstrap import init_db
+    from app.models import User
+    from app.users.search import apply_username_search
+
+    app = create_app({"USER_SUBSTRING_SEARCH": "trigram", "CATALOG_CACHE_ENABLED": False})
+    with app.app_context():
+        init_db()
+        db.session.execute(insert(User), [
+            {"username": f"Patron{i:07d}", "password_hash": "x"} for i in range(args.users)
+        ])
+        db.session.commit()
+
+        def ilike():
+            return User.query.filter(User.username.ilike("%patron00123%")).limit(20).all()
+
+        def search(term, mode):
+            return lambda: apply_username_search(User.query, term, mode).limit(20).all()
+
+        cases = [
+            ("ilike (before)", "like", ilike),
+            ("prefix", "like", search("Patron00123", "prefix")),
+            ("contains/like", "like", search("n00123", "contains")),
+            ("contains/trigram", "trigram", search("n00123", "contains")),
+        ]
+        print(f"{args.users} users, 20 results per search")
+        for name, matcher, fn in cases:
+            app.config["USER_SUBSTRING_SEARCH"] = matcher
+            print(f"{name:>16}: {per_call_ms(fn, args.iterations):8.3f} ms")
+
+if __name__ == "__main__":
+    main()
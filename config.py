@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'super-secret-key')
@@ -15,8 +16,78 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-string')
-    # Swagger config
+    # HS256 signs with JWT_SECRET_KEY; RS256/EdDSA (needs the cryptography
+    # package) sign with a private key and verify by key id, see app/auth/keys.py
+    JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
+    JWT_PRIVATE_KEY_PATH = os.environ.get('JWT_PRIVATE_KEY_PATH')
+    JWT_KEY_ID = os.environ.get('JWT_KEY_ID')
+    JWT_PUBLIC_KEY_PATHS = [path for path in os.environ.get('JWT_PUBLIC_KEY_PATHS', '').split(os.pathsep) if path]
+    JWT_JWKS_URL = os.environ.get('JWT_JWKS_URL')
+    JWT_JWKS_CACHE_TTL = 300
+    JWT_JWKS_MIN_REFRESH = 30
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=15)
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    # Seconds between pulls of other workers' revocations into this process
+    TOKEN_REVOCATION_SYNC_INTERVAL = 5
+
+    # Per-process catalog read cache (entries expire after CATALOG_CACHE_TTL seconds)
+    CATALOG_CACHE_ENABLED = os.environ.get('CATALOG_CACHE_ENABLED', 'true').lower() in ('true', '1', 't')
+    CATALOG_CACHE_MAX_RECORDS = 10000
+    CATALOG_CACHE_MAX_QUERIES = 256
+    # Bound on the summed size of cached query bodies; larger bodies are not cached
+    CATALOG_CACHE_MAX_QUERY_BYTES = 32 * 1024 * 1024
+    CATALOG_CACHE_TTL = 30
+
+    # Returned loans older than LOAN_ARCHIVE_DAYS move to borrowed_book_history
+    # when `flask archive-loans` runs
+    LOAN_ARCHIVE_DAYS = 30
+    LOAN_ARCHIVE_BATCH_SIZE = 1000
+
+    # Loan period for a book handed to the head of its hold queue on return
+    HOLD_LOAN_DAYS = 14
+
+    # bcrypt work factor for new hashes; logins rehash stored hashes of another cost
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', '12'))
+    # Processes that hash and verify passwords off the request threads (0 hashes inline)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', '2'))
+    # Processes used by bulk user imports (0 uses every core)
+    BULK_HASH_WORKERS = int(os.environ.get('BULK_HASH_WORKERS', '0'))
+
+    # Matcher for ?match=contains user searches: 'like' scans the table,
+    # 'trigram' keeps an SQLite FTS5 trigram index over usernames
+    USER_SUBSTRING_SEARCH = os.environ.get('USER_SUBSTRING_SEARCH', 'like')
+
+    # Seconds a /readyz database check is reused before probing again
+    READINESS_PROBE_TTL = 5
+
+    # Swagger config; /apidocs/ and /apispec.json are only served when enabled
+    SWAGGER_ENABLED = os.environ.get('SWAGGER_ENABLED', 'true').lower() in ('true', '1', 't')
     SWAGGER = {
         'title': 'Library Management API',
         'uiversion': 3
     }
+
+class DevelopmentConfig(Config):
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', '10'))
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_HASH_WORKERS = 0
+    BULK_HASH_WORKERS = 1
+    CATALOG_CACHE_ENABLED = False
+
+class ProductionConfig(Config):
+    SWAGGER_ENABLED = os.environ.get('SWAGGER_ENABLED', 'false').lower() in ('true', '1', 't')
+
+# Selected by the APP_ENV environment variable; Azure defaults to production
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'testing': TestingConfig,
+    'production': ProductionConfig,
+}
+
+def config_for_environment():
+    default = 'production' if 'WEBSITE_HOSTNAME' in os.environ else 'development'
+    return CONFIGS[os.environ.get('APP_ENV', default)]
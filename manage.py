@@ -1,8 +1,20 @@
+import time
 import click
 from flask.cli import with_appcontext
 
-from app import create_app, db, bcrypt
+from app import create_app, db, migrations
+from app.bootstrap import init_db
 from app.models import User, Book
+from app.bulk import BULK_FORMATS, detect_format
+from app.books.importer import import_books, DEFAULT_CHUNK_SIZE
+from app.users.importer import import_users
+from app.books.facets import rebuild_category_facets
+from app.loans.consistency import find_loan_state_drift, repair_loan_state
+from app.loans.archive import archive_returned_loans
+from app.loans.stats import rebuild_loan_stats
+from app.catalog import bump_catalog_version
+from app.passwords import hash_password
+from app.auth.revocation import prune_revoked_tokens
 
 app = create_app()
 
@@ -12,17 +24,17 @@ def seed():
     """Reset and seed the database with sample data."""
     click.echo("⚠️  Dropping and recreating database...")
     db.drop_all()
-    db.create_all()
+    init_db(seed=False)
 
     click.echo("🔑 Creating users...")
     admin = User(
         username="admin",
-        password_hash=bcrypt.generate_password_hash("admin123").decode(),
+        password_hash=hash_password("admin123"),
         is_admin=True
     )
     user1 = User(
         username="user1",
-        password_hash=bcrypt.generate_password_hash("user123").decode(),
+        password_hash=hash_password("user123"),
         is_admin=False
     )
     db.session.add_all([admin, user1])
@@ -35,6 +47,116 @@ def seed():
     ]
     for b in samples:
         db.session.add(Book(**b))
+    db.session.flush()
+    rebuild_category_facets(db.session.connection())
 
     db.session.commit()
     click.echo("✅ Database seeded!")
+
+@app.cli.command("import-books")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(BULK_FORMATS), help="Defaults to the file extension.")
+@click.option("--chunk-size", default=DEFAULT_CHUNK_SIZE, show_default=True, help="Rows per transaction.")
+@with_appcontext
+def import_books_command(path, fmt, chunk_size):
+    """Bulk import books from a CSV or NDJSON file."""
+    fmt = fmt or detect_format(filename=path)
+    click.echo(f"📚 Importing {fmt} from {path}...")
+    with open(path, "rb") as f:
+        report = import_books(f, fmt, chunk_size=chunk_size)
+
+    for error in report["errors"]:
+        click.echo(f"row {error['row']}: {error['error']}", err=True)
+    click.echo(
+        f"✅ Imported {report['inserted']} of {report['rows']} rows "
+        f"in {report['elapsed_seconds']}s ({report['rows_per_second']} rows/s)"
+    )
+
+@app.cli.command("import-users")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(BULK_FORMATS), help="Defaults to the file extension.")
+@click.option("--chunk-size", default=DEFAULT_CHUNK_SIZE, show_default=True, help="Rows per transaction.")
+@click.option("--workers", type=int, help="Hashing processes; defaults to BULK_HASH_WORKERS or every core.")
+@with_appcontext
+def import_users_command(path, fmt, chunk_size, workers):
+    """Bulk create users from a CSV or NDJSON file."""
+    fmt = fmt or detect_format(filename=path)
+    click.echo(f"🔑 Importing {fmt} users from {path}...")
+    with open(path, "rb") as f:
+        report = import_users(f, fmt, chunk_size=chunk_size, workers=workers)
+
+    for error in report["errors"]:
+        click.echo(f"row {error['row']}: {error['error']}", err=True)
+    click.echo(
+        f"✅ Imported {report['inserted']} of {report['rows']} users "
+        f"in {report['elapsed_seconds']}s ({report['rows_per_second']} rows/s)"
+    )
+
+@app.cli.command("db-upgrade")
+@with_appcontext
+def db_upgrade():
+    """Create missing tables, apply pending migrations and install the search indexes, without seeding."""
+    applied = init_db(seed=False)
+    with db.engine.connect() as connection:
+        version = migrations.current_version(connection)
+    for number, description in applied:
+        click.echo(f"Applied migration {number}: {description}")
+    click.echo(f"✅ Database at schema version {version}")
+
+@app.cli.command("check-loans")
+@click.option("--repair", is_flag=True, help="Rewrite drifted book rows from borrowed_book.")
+@with_appcontext
+def check_loans(repair):
+    """Check the loan state stored on books against the active loans."""
+    with db.engine.begin() as connection:
+        drift = find_loan_state_drift(connection)
+    click.echo(f"Books lent out without matching loan state: {len(drift['lent'])} {drift['lent'][:20]}")
+    click.echo(f"Books marked lent out without an active loan: {len(drift['free'])} {drift['free'][:20]}")
+    if drift["duplicate_active_loans"]:
+        click.echo(f"⚠️  Books with several active loans: {drift['duplicate_active_loans'][:20]}")
+
+    if not repair:
+        return
+    changed = repair_loan_state(db.session.connection())
+    rebuild_category_facets(db.session.connection())
+    bump_catalog_version()
+    db.session.commit()
+    click.echo(f"✅ Repaired {changed} book rows")
+
+@app.cli.command("archive-loans")
+@click.option("--days", default=lambda: app.config["LOAN_ARCHIVE_DAYS"], type=int,
+              show_default="LOAN_ARCHIVE_DAYS", help="Archive loans returned more than this many days ago.")
+@click.option("--batch-size", default=lambda: app.config["LOAN_ARCHIVE_BATCH_SIZE"], type=int,
+              show_default="LOAN_ARCHIVE_BATCH_SIZE", help="Loans moved per transaction.")
+@click.option("--every", type=int, default=0,
+              help="Keep running and archive every this many seconds; run in one process only.")
+@with_appcontext
+def archive_loans(days, batch_size, every):
+    """Move old returned loans from borrowed_book to the history table."""
+    while True:
+        try:
+            moved = archive_returned_loans(db.engine, days, batch_size)
+            click.echo(f"✅ Archived {moved} returned loans")
+        except Exception:
+            if not every:
+                raise
+            app.logger.exception("Loan archival failed")
+        if not every:
+            break
+        time.sleep(every)
+
+@app.cli.command("rebuild-stats")
+@with_appcontext
+def rebuild_stats():
+    """Recompute the circulation statistics from the loan tables."""
+    with db.engine.begin() as connection:
+        rebuild_loan_stats(connection)
+    click.echo("✅ Circulation statistics rebuilt")
+
+@app.cli.command("prune-tokens")
+@with_appcontext
+def prune_tokens():
+    """Delete revoked-token rows whose tokens have expired."""
+    deleted = prune_revoked_tokens()
+    db.session.commit()
+    click.echo(f"✅ Pruned {deleted} expired revoked tokens")
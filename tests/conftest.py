@@ -1,23 +1,28 @@
+import os
 import pytest
 from app import create_app
+from app.bootstrap import init_db
 from app.models import db, User, Book
 from app import bcrypt
 import uuid
 from flask_jwt_extended import create_access_token
 
+# Low bcrypt cost and inline hashing for every app built by the tests
+os.environ.setdefault("APP_ENV", "testing")
+
 @pytest.fixture(scope="module")
 def app():
     # create the Flask app in testing mode
-    app = create_app()
-    app.config.update({
+    app = create_app({
         "TESTING": True,
         "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
         "JWT_SECRET_KEY": "test-secret-key",
+        "CATALOG_CACHE_ENABLED": False,
     })
 
     # set up the DB
     with app.app_context():
-        db.create_all()
+        init_db()
         # seed users only if they don't exist
         if not User.query.filter_by(username="admin").first():
             admin = User(
@@ -62,10 +67,23 @@ def client(app):
 def admin_token(app):
     # Create a token with admin claims directly
     with app.app_context():
-        return create_access_token(identity=1, additional_claims={"is_admin": True})
+        return create_access_token(identity="1", additional_claims={"is_admin": True})
 
 @pytest.fixture()
 def user_token(app):
     # Create a token with non-admin claims directly
     with app.app_context():
-        return create_access_token(identity=2, additional_claims={"is_admin": False})
+        return create_access_token(identity="2", additional_claims={"is_admin": False})
+
+@pytest.fixture()
+def statements(app):
+    # SQL statements sent to the database while the test runs
+    from sqlalchemy import event
+    recorded = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append(statement)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(engine, "before_cursor_execute", record)
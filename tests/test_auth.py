@@ -11,3 +11,107 @@ def test_login_failure(client):
         "username": "admin", "password": "wrongpass"
     })
     assert res.status_code == 401
+
+def test_login_rehashes_password_when_cost_changes(client, app):
+    import bcrypt
+    from app import db
+    from app.models import User
+    from app.passwords import hash_rounds
+    with app.app_context():
+        user = User(username="legacy-cost", is_admin=False,
+                    password_hash=bcrypt.hashpw(b"secret", bcrypt.gensalt(5)).decode())
+        db.session.add(user)
+        db.session.commit()
+
+    res = client.post("/api/auth/login", json={"username": "legacy-cost", "password": "secret"})
+    assert res.status_code == 200
+    with app.app_context():
+        stored = User.query.filter_by(username="legacy-cost").one().password_hash
+        assert hash_rounds(stored) == app.config["BCRYPT_LOG_ROUNDS"] == 4
+    assert client.post("/api/auth/login", json={
+        "username": "legacy-cost", "password": "secret"
+    }).status_code == 200
+
+def test_password_pool_hashes_in_worker_processes(app):
+    from app import passwords
+    app.config["PASSWORD_HASH_WORKERS"] = 1
+    try:
+        with app.app_context():
+            pw_hash = passwords.hash_password("pooled")
+            assert passwords.check_password(pw_hash, "pooled")
+            assert not passwords.check_password(pw_hash, "other")
+            assert not passwords.check_password("not-a-hash", "pooled")
+    finally:
+        app.config["PASSWORD_HASH_WORKERS"] = 0
+        passwords.shutdown()
+
+def test_login_runs_one_query(client, statements):
+    res = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+    assert res.status_code == 200
+    assert len(statements) == 1 and "WHERE user.username = ?" in statements[0]
+
+def _login(client):
+    return client.post("/api/auth/login", json={"username": "admin", "password": "admin123"}).get_json()
+
+def test_refresh_token_rotation(client):
+    tokens = _login(client)
+    res = client.post("/api/auth/refresh", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert res.status_code == 200
+    rotated = res.get_json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert client.get("/api/holds/mine", headers={
+        "Authorization": f"Bearer {rotated['access_token']}"
+    }).status_code == 200
+
+    # a refresh token works once, and access tokens cannot refresh
+    assert client.post("/api/auth/refresh", headers={
+        "Authorization": f"Bearer {tokens['refresh_token']}"
+    }).status_code == 401
+    assert client.post("/api/auth/refresh", headers={
+        "Authorization": f"Bearer {rotated['access_token']}"
+    }).status_code == 422
+
+def test_logout_revokes_token(client):
+    tokens = _login(client)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert client.get("/api/holds/mine", headers=headers).status_code == 200
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert client.get("/api/holds/mine", headers=headers).status_code == 401
+    assert client.post("/api/auth/logout", headers=headers).status_code == 401
+
+def test_revocations_reach_other_workers_on_sync(app):
+    import time
+    from app import db
+    from app.auth.revocation import RevocationList, revoke_token
+    now = [0.0]
+    other_worker = RevocationList(sync_interval=5, clock=lambda: now[0])
+    with app.app_context():
+        assert not other_worker.is_revoked("elsewhere")
+        revoke_token({"jti": "elsewhere", "exp": time.time() + 60})
+        db.session.commit()
+        now[0] = 4.9
+        assert not other_worker.is_revoked("elsewhere")
+        now[0] = 5.0
+        assert other_worker.is_revoked("elsewhere")
+
+def test_revocations_after_prune_reach_other_workers(app):
+    import time
+    from app import db
+    from datetime import datetime
+    from app.models import RevokedToken
+    from app.auth.revocation import RevocationList, revoke_token, prune_revoked_tokens
+    now = [0.0]
+    other_worker = RevocationList(sync_interval=5, clock=lambda: now[0])
+    with app.app_context():
+        for jti in ("pruned-a", "pruned-b"):
+            revoke_token({"jti": jti, "exp": time.time() + 60})
+        db.session.commit()
+        other_worker.sync()
+        # Every token revoked so far expires, and the pruning job runs
+        db.session.execute(db.update(RevokedToken).values(expires_at=datetime(2000, 1, 1)))
+        prune_revoked_tokens()
+        db.session.commit()
+        revoke_token({"jti": "after-prune", "exp": time.time() + 60})
+        db.session.commit()
+        now[0] = 5.0
+        assert other_worker.is_revoked("after-prune")
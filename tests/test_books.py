@@ -34,3 +34,232 @@ def test_add_book_conflict(client, admin_token, app):
         "title":"Dup","author":"Auth","isbn": seeded_isbn,"category":"Cat"
     }, headers={"Authorization": f"Bearer {admin_token}"})
     assert res.status_code == 400
+
+def _count_list_queries(client, statements, token):
+    statements.clear()
+    res = client.get("/api/books", headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    return list(statements), res.get_json()
+
+def test_list_books_query_count_is_constant(client, admin_token, app, statements):
+    from datetime import date, timedelta
+    from app import db
+    from app.models import Book, BorrowedBook
+
+    def lend_books(count, prefix):
+        with app.app_context():
+            for i in range(count):
+                due = date.today() + timedelta(days=3)
+                book = Book(title=f"{prefix}-{i}", author="A", isbn=f"{prefix}-{i}",
+                            category="Loaned", available=False, due_date=due, borrower_id=2)
+                db.session.add(book)
+                db.session.flush()
+                db.session.add(BorrowedBook(user_id=2, book_id=book.id, return_date=due))
+            db.session.commit()
+
+    lend_books(2, "batch-a")
+    small, _ = _count_list_queries(client, statements, admin_token)
+
+    lend_books(40, "batch-b")
+    large, books = _count_list_queries(client, statements, admin_token)
+
+    assert len(small) == len(large)
+    # loan state is read from the book row itself
+    assert not any("borrowed_book" in s for s in large)
+    lent = [b for b in books if b["title"].startswith("batch-")]
+    assert len(lent) == 42
+    assert all("due_date" in b and b["is_overdue"] is False for b in lent)
+
+def test_list_books_keyset_pagination(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    all_ids = [b["id"] for b in client.get("/api/books", headers=headers).get_json()]
+
+    seen, cursor = [], None
+    while True:
+        url = "/api/books?limit=2" + (f"&after={cursor}" if cursor else "")
+        page = client.get(url, headers=headers).get_json()
+        assert len(page["items"]) <= 2
+        seen.extend(b["id"] for b in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(all_ids)
+
+def test_list_books_pagination_rejects_bad_limit(client, admin_token):
+    res = client.get("/api/books?limit=0", headers={
+        "Authorization": f"Bearer {admin_token}"
+    })
+    assert res.status_code == 400
+
+def test_list_books_ndjson_stream(client, admin_token):
+    import json
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    expected = client.get("/api/books", headers=headers).get_json()
+
+    res = client.get("/api/books?stream=1", headers=headers)
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in res.get_data(as_text=True).splitlines()]
+    assert sorted(b["id"] for b in lines) == sorted(b["id"] for b in expected)
+
+    res = client.get("/api/books/search?title=SeedBook", headers={
+        **headers, "Accept": "application/x-ndjson"
+    })
+    assert res.mimetype == "application/x-ndjson"
+    assert [json.loads(line)["title"] for line in res.get_data(as_text=True).splitlines()] == ["SeedBook"]
+
+def test_search_books_fulltext(client, admin_token, app):
+    from app import db
+    from app.models import Book
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with app.app_context():
+        db.session.add_all([
+            Book(title="Ocean Tides", author="Marina Waters", isbn="fts-1", category="Science"),
+            Book(title="Deep Ocean Ocean Currents", author="Ocean Lab", isbn="fts-2", category="Science"),
+            Book(title="Mountain Air", author="Rocky Peak", isbn="fts-3", category="Travel", available=False),
+        ])
+        db.session.commit()
+
+    # prefix + multi-term, ranked by relevance
+    res = client.get("/api/books/search?q=ocea%20scien", headers=headers)
+    assert [b["isbn"] for b in res.get_json()] == ["fts-2", "fts-1"]
+
+    # combines with the existing filters
+    res = client.get("/api/books/search?q=mountain&available=true", headers=headers)
+    assert res.get_json() == []
+
+    # index follows updates to the book row
+    with app.app_context():
+        book = Book.query.filter_by(isbn="fts-3").first()
+        book.title = "Glacier Air"
+        db.session.commit()
+    res = client.get("/api/books/search?q=glacier", headers=headers)
+    assert [b["isbn"] for b in res.get_json()] == ["fts-3"]
+    res = client.get("/api/books/search?q=mountain", headers=headers)
+    assert res.get_json() == []
+
+def test_list_books_etag_revalidation(client, admin_token, statements):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    res = client.get("/api/books", headers=headers)
+    etag = res.headers["ETag"]
+    other = client.get("/api/books?available=true", headers=headers).headers["ETag"]
+    assert other != etag
+
+    statements.clear()
+    res = client.get("/api/books", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.headers["ETag"] == etag
+    assert not any("FROM book" in s for s in statements)
+
+    client.post("/api/books", json={
+        "title": "Etag", "author": "A", "isbn": "etag-1", "category": "C"
+    }, headers=headers)
+    res = client.get("/api/books", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+def test_bulk_import_books(client, admin_token, app):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with app.app_context():
+        from app.models import Book
+        seeded_isbn = Book.query.filter_by(title="SeedBook").first().isbn
+
+    body = "\n".join([
+        "title,author,isbn,category",
+        "Bulk One,Writer,bulk-1,Import",
+        "Bulk Two,Writer,bulk-2,Import",
+        "Bulk Dup,Writer,bulk-1,Import",
+        f"Existing,Writer,{seeded_isbn},Import",
+        "No Author,,bulk-3,Import",
+    ])
+    res = client.post("/api/books/bulk", data=body, content_type="text/csv", headers=headers)
+    assert res.status_code == 200
+    report = res.get_json()
+    assert report["rows"] == 5
+    assert report["inserted"] == 2
+    assert [(e["row"], e["error"]) for e in report["errors"]] == [
+        (3, "Duplicate ISBN in input"),
+        (4, "ISBN already exists"),
+        (5, "Missing fields: author"),
+    ]
+
+    ndjson = '{"title": "Bulk Three", "author": "W", "isbn": "bulk-4", "category": "Import"}\nnot json\n'
+    res = client.post("/api/books/bulk", data=ndjson, content_type="application/x-ndjson", headers=headers)
+    report = res.get_json()
+    assert report["inserted"] == 1
+    assert report["errors"][0]["row"] == 2
+
+    res = client.get("/api/books/search?category=Import", headers=headers)
+    assert sorted(b["isbn"] for b in res.get_json()) == ["bulk-1", "bulk-2", "bulk-4"]
+
+def test_bulk_import_books_decodes_utf8(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    bom = "\ufefftitle,author,isbn,category\nBOM Book,Writer,bom-1,Import\n".encode("utf-8")
+    report = client.post("/api/books/bulk", data=bom, content_type="text/csv", headers=headers).get_json()
+    assert (report["inserted"], report["errors"]) == (1, [])
+
+    rows = "".join(f"Latin {i},Writer,latin-{i:04d},Import\n" for i in range(400))
+    body = ("title,author,isbn,category\n" + rows).encode() + "Caf\u00e9,W,latin-x,Import\n".encode("latin-1")
+    res = client.post("/api/books/bulk", data=body, content_type="text/csv", headers=headers)
+    assert res.status_code == 200
+    report = res.get_json()
+    assert 0 < report["inserted"] < 400
+    assert report["errors"][-1]["row"] == report["inserted"] + 1
+    assert "not valid UTF-8" in report["errors"][-1]["error"]
+
+def test_book_facets(client, admin_token, app):
+    from datetime import date, timedelta
+    from app import db
+    from app.models import Book
+    from app.books.facets import rebuild_category_facets, query_facets
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with app.app_context():
+        # the fixture inserts its book directly, bypassing the counters
+        rebuild_category_facets(db.session.connection())
+        db.session.commit()
+
+    res = client.post("/api/books", json={
+        "title": "Facet", "author": "A", "isbn": "facet-1", "category": "Facets"
+    }, headers=headers)
+    book_id = res.get_json()["id"]
+    client.post("/api/loans/assign", json={
+        "book_id": book_id, "user_id": 2,
+        "return_date": (date.today() + timedelta(days=1)).isoformat()
+    }, headers=headers)
+
+    facets = client.get("/api/books/facets", headers=headers).get_json()
+    with app.app_context():
+        assert facets == query_facets(Book.query)
+    assert facets["category"]["Facets"] == 1
+
+    filtered = client.get("/api/books/facets?category=Facets", headers=headers).get_json()
+    assert filtered == {"total": 1, "category": {"Facets": 1}, "available": {"true": 0, "false": 1}}
+
+def test_list_books_sparse_fields(client, admin_token, statements):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    res = client.get("/api/books?fields=id,title", headers=headers)
+
+    assert res.status_code == 200
+    books = res.get_json()
+    assert books and all(set(b) == {"id", "title"} for b in books)
+    book_selects = [s for s in statements if "FROM book" in s]
+    assert book_selects and all("book.author" not in s for s in book_selects)
+    assert not any("borrowed_book" in s for s in statements)
+
+    from datetime import date, timedelta
+    res = client.post("/api/books", json={
+        "title": "Sparse", "author": "A", "isbn": "sparse-1", "category": "C"
+    }, headers=headers)
+    client.post("/api/loans/assign", json={
+        "book_id": res.get_json()["id"], "user_id": 2,
+        "return_date": (date.today() + timedelta(days=1)).isoformat()
+    }, headers=headers)
+    lent = client.get("/api/books/search?available=false&fields=title,due_date", headers=headers).get_json()
+    assert all(set(b) <= {"title", "due_date"} for b in lent)
+    assert {"title": "Sparse", "due_date": (date.today() + timedelta(days=1)).isoformat()} in lent
+
+    res = client.get("/api/books?fields=id,secret", headers=headers)
+    assert res.status_code == 400
@@ -0,0 +1,100 @@
+from datetime import date, timedelta
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.bootstrap import init_db
+from app.cache import LRUCache
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"hits": 3, "misses": 1, "size": 2}
+
+def test_lru_cache_entries_expire():
+    now = [0.0]
+    cache = LRUCache(maxsize=10, ttl=5, clock=lambda: now[0])
+    cache.set("a", 1)
+    now[0] = 4.9
+    assert cache.get("a") == 1
+    now[0] = 5.0
+    assert cache.get("a") is None
+
+def test_lru_cache_bounds_total_bytes():
+    cache = LRUCache(maxsize=10, ttl=60, maxbytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"5678")
+    cache.set("c", b"90ab")
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 0, "misses": 1, "size": 2, "bytes": 8}
+    cache.set("huge", b"x" * 11)
+    assert cache.get("huge") is None and cache.get("b") == b"5678"
+
+@pytest.fixture(scope="module")
+def cached_app():
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "JWT_SECRET_KEY": "test-secret-key",
+        "CATALOG_CACHE_ENABLED": True,
+    })
+    with app.app_context():
+        init_db()
+    yield app
+    with app.app_context():
+        db.drop_all()
+
+def test_catalog_reads_hit_cache_until_a_write(cached_app):
+    client = cached_app.test_client()
+    with cached_app.app_context():
+        token = create_access_token(identity="1", additional_claims={"is_admin": True})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = client.get("/api/books/search?available=true", headers=headers).get_json()
+    assert client.get("/api/books/search?available=true", headers=headers).get_json() == first
+    stats = client.get("/api/books/cache-stats", headers=headers).get_json()
+    assert stats["queries"]["hits"] == 1
+
+    book_id = first[0]["id"]
+    due = (date.today() + timedelta(days=7)).isoformat()
+    res = client.post("/api/loans/assign", json={
+        "book_id": book_id, "user_id": 2, "return_date": due
+    }, headers=headers)
+    assert res.status_code == 200
+
+    after = client.get("/api/books/search?available=true", headers=headers).get_json()
+    assert book_id not in [b["id"] for b in after]
+    lent = client.get("/api/books/search?available=false", headers=headers).get_json()
+    assert [b["due_date"] for b in lent if b["id"] == book_id] == [due]
+
+def test_cached_records_follow_writes_from_another_worker(tmp_path):
+    config = {
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'shared.db'}",
+        "JWT_SECRET_KEY": "test-secret-key",
+        "CATALOG_CACHE_ENABLED": True,
+    }
+    worker_a, worker_b = create_app(config), create_app(config)
+    with worker_a.app_context():
+        init_db()
+        token = create_access_token(identity="1", additional_claims={"is_admin": True})
+    headers = {"Authorization": f"Bearer {token}"}
+    client_a, client_b = worker_a.test_client(), worker_b.test_client()
+
+    available = client_a.get("/api/books/search?available=true", headers=headers).get_json()
+    book_id = available[0]["id"]
+    due = (date.today() + timedelta(days=7)).isoformat()
+    res = client_b.post("/api/loans/assign", json={
+        "book_id": book_id, "user_id": 2, "return_date": due
+    }, headers=headers)
+    assert res.status_code == 200
+
+    lent = client_a.get("/api/books/search?available=false", headers=headers)
+    assert [(b["available"], b["due_date"]) for b in lent.get_json() if b["id"] == book_id] == [(False, due)]
+    revalidated = client_a.get("/api/books/search?available=false", headers={
+        **headers, "If-None-Match": lent.headers["ETag"]
+    })
+    assert revalidated.status_code == 304
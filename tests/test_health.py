@@ -0,0 +1,36 @@
+def test_healthz_does_not_query_database(client, statements):
+    res = client.get("/healthz")
+    assert res.status_code == 200 and res.get_json() == {"status": "ok"}
+    assert statements == []
+
+def test_readiness_probe_is_cached(app):
+    from app.health.routes import ReadinessProbe
+    now = [0.0]
+    probes = []
+    probe = ReadinessProbe(ttl=5, clock=lambda: now[0])
+    probe._probe = lambda: probes.append(now[0]) or {"ready": True, "database": "ok"}
+    with app.app_context():
+        probe.check()
+        now[0] = 4.9
+        probe.check()
+        now[0] = 5.0
+        probe.check()
+    assert probes == [0.0, 5.0]
+
+def test_readyz_reports_migrated_database(client):
+    res = client.get("/readyz")
+    assert res.status_code == 200
+    assert res.get_json() == {"status": "ready", "database": "ok"}
+
+def test_create_app_leaves_database_to_init_db(tmp_path):
+    from app import create_app
+    db_path = tmp_path / "fresh.db"
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}", "READINESS_PROBE_TTL": 0})
+    assert not db_path.exists()
+
+    client = app.test_client()
+    assert client.get("/readyz").status_code == 503
+    assert app.test_cli_runner().invoke(args=["init-db"]).exit_code == 0
+    assert client.get("/readyz").status_code == 200
+    res = client.post("/api/auth/login", json={"username": "admin", "password": "admin123"})
+    assert res.status_code == 200
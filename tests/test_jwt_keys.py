@@ -0,0 +1,86 @@
+import json
+import pytest
+from app import create_app
+from app.bootstrap import init_db
+
+pytest.importorskip("cryptography")
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, ed25519
+
+def _write_key(tmp_path, name, private_key):
+    private_path = tmp_path / f"{name}.pem"
+    public_path = tmp_path / f"{name}.pub.pem"
+    private_path.write_bytes(private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    public_path.write_bytes(private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo))
+    return str(private_path), str(public_path)
+
+def _node(**config):
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", **config})
+    with app.app_context():
+        init_db()
+    return app
+
+def _login(app):
+    return app.test_client().post("/api/auth/login", json={
+        "username": "admin", "password": "admin123"
+    }).get_json()["access_token"]
+
+@pytest.mark.parametrize("algorithm, generate", [
+    ("RS256", lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048)),
+    ("EdDSA", ed25519.Ed25519PrivateKey.generate),
+])
+def test_verifier_node_checks_tokens_with_public_key_only(tmp_path, algorithm, generate):
+    import jwt
+    private_path, public_path = _write_key(tmp_path, "current", generate())
+    issuer = _node(JWT_ALGORITHM=algorithm, JWT_PRIVATE_KEY_PATH=private_path)
+    verifier = _node(JWT_ALGORITHM=algorithm, JWT_PUBLIC_KEY_PATHS=[public_path], JWT_SECRET_KEY=None)
+
+    token = _login(issuer)
+    kid = jwt.get_unverified_header(token)["kid"]
+    jwks = issuer.test_client().get("/.well-known/jwks.json").get_json()
+    assert [key["kid"] for key in jwks["keys"]] == [kid]
+
+    headers = {"Authorization": f"Bearer {token}"}
+    assert verifier.test_client().get("/api/users", headers=headers).status_code == 200
+    # the verifier cannot issue tokens of its own
+    with verifier.app_context(), pytest.raises(RuntimeError):
+        from flask_jwt_extended import create_access_token
+        create_access_token(identity="1")
+
+def test_rotated_keys_verify_until_dropped(tmp_path):
+    old_private, old_public = _write_key(tmp_path, "old", ed25519.Ed25519PrivateKey.generate())
+    new_private, new_public = _write_key(tmp_path, "new", ed25519.Ed25519PrivateKey.generate())
+    old_token = _login(_node(JWT_ALGORITHM="EdDSA", JWT_PRIVATE_KEY_PATH=old_private))
+    new_token = _login(_node(JWT_ALGORITHM="EdDSA", JWT_PRIVATE_KEY_PATH=new_private))
+
+    during = _node(JWT_ALGORITHM="EdDSA", JWT_PUBLIC_KEY_PATHS=[old_public, new_public]).test_client()
+    after = _node(JWT_ALGORITHM="EdDSA", JWT_PUBLIC_KEY_PATHS=[new_public]).test_client()
+    for token in (old_token, new_token):
+        assert during.get("/api/holds/mine", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert after.get("/api/holds/mine", headers={"Authorization": f"Bearer {new_token}"}).status_code == 200
+    assert after.get("/api/holds/mine", headers={"Authorization": f"Bearer {old_token}"}).status_code == 422
+
+def test_jwks_url_keys_are_cached_and_refetched_for_new_kids(tmp_path):
+    import jwt as pyjwt
+    from app.auth.keys import KeyRing
+    first = ed25519.Ed25519PrivateKey.generate()
+    second = ed25519.Ed25519PrivateKey.generate()
+    jwks_path = tmp_path / "jwks.json"
+    issuer_keys = KeyRing("EdDSA", signing_key=first)
+    jwks_path.write_text(json.dumps(issuer_keys.jwks()))
+
+    now = [0.0]
+    verifier = KeyRing("EdDSA", jwks_url=jwks_path.as_uri(), jwks_ttl=300, jwks_min_refresh=30,
+                       clock=lambda: now[0])
+    assert verifier.verification_key(issuer_keys.kid) is not None
+
+    rotated = KeyRing("EdDSA", signing_key=second, public_keys=[first.public_key()])
+    jwks_path.write_text(json.dumps(rotated.jwks()))
+    now[0] = 10.0
+    with pytest.raises(pyjwt.InvalidTokenError):
+        verifier.verification_key(rotated.kid)
+    now[0] = 30.0
+    assert verifier.verification_key(rotated.kid) is not None
+    assert verifier.verification_key(issuer_keys.kid) is not None
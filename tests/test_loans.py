@@ -28,3 +28,345 @@ def test_assign_and_return_cycle(client, admin_token, app):
         from app.models import BorrowedBook
         loan = BorrowedBook.query.filter_by(book_id=1, returned=True).first()
         assert loan is not None
+
+def test_assign_and_return_maintain_book_loan_state(client, admin_token, app):
+    due = (date.today() + timedelta(days=7)).isoformat()
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    client.post("/api/loans/assign", json={
+        "book_id": 2, "user_id": 2, "return_date": due
+    }, headers=headers)
+    with app.app_context():
+        from app import db
+        from app.models import Book
+        book = db.session.get(Book, 2)
+        assert (book.available, str(book.due_date), book.borrower_id) == (False, due, 2)
+
+    client.post("/api/loans/return/2", headers=headers)
+    with app.app_context():
+        from app import db
+        from app.models import Book
+        book = db.session.get(Book, 2)
+        assert (book.available, book.due_date, book.borrower_id) == (True, None, None)
+
+def test_loan_state_drift_is_detected_and_repaired(app):
+    from app import db
+    from app.models import Book, BorrowedBook
+    from app.loans.consistency import find_loan_state_drift, repair_loan_state
+    due = date.today() + timedelta(days=3)
+    with app.app_context():
+        # active loan that never reached the book row
+        db.session.add(BorrowedBook(user_id=2, book_id=3, return_date=due))
+        # book marked lent out without any active loan
+        db.session.get(Book, 4).available = False
+        db.session.commit()
+
+        with db.engine.begin() as connection:
+            drift = find_loan_state_drift(connection)
+            assert (drift["lent"], drift["free"]) == ([3], [4])
+            assert repair_loan_state(connection) == 2
+            drift = find_loan_state_drift(connection)
+            assert drift == {"lent": [], "free": [], "duplicate_active_loans": []}
+
+        db.session.expire_all()
+        book = db.session.get(Book, 3)
+        assert (book.available, book.due_date, book.borrower_id) == (False, due, 2)
+        assert db.session.get(Book, 4).available is True
+
+def test_concurrent_checkouts_have_exactly_one_winner(tmp_path):
+    import threading
+    from flask_jwt_extended import create_access_token
+    from app import create_app, db
+    from app.bootstrap import init_db
+    from app.models import BorrowedBook
+
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'race.db'}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 30}, "pool_size": 20},
+        "JWT_SECRET_KEY": "test-secret-key",
+        "CATALOG_CACHE_ENABLED": False,
+    })
+    with app.app_context():
+        init_db()
+        token = create_access_token(identity="1", additional_claims={"is_admin": True})
+    headers = {"Authorization": f"Bearer {token}"}
+    due = (date.today() + timedelta(days=7)).isoformat()
+
+    attempts = 200
+    barrier = threading.Barrier(attempts)
+    statuses = []
+
+    def attempt():
+        client = app.test_client()
+        barrier.wait()
+        res = client.post("/api/loans/assign", json={
+            "book_id": 1, "user_id": 2, "return_date": due
+        }, headers=headers)
+        statuses.append(res.status_code)
+
+    threads = [threading.Thread(target=attempt) for _ in range(attempts)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses.count(200) == 1
+    assert statuses.count(400) == attempts - 1
+    with app.app_context():
+        assert BorrowedBook.query.filter_by(book_id=1, returned=False).count() == 1
+        db.engine.dispose()
+
+def test_batch_assign_and_return(client, admin_token, app):
+    from sqlalchemy import event
+    from app import db
+    from app.models import Book
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    due = (date.today() + timedelta(days=7)).isoformat()
+    with app.app_context():
+        books = [Book(title=f"Stack {i}", author="A", isbn=f"stack-{i}", category="Stack")
+                 for i in range(3)]
+        db.session.add_all(books)
+        db.session.commit()
+        ids = [b.id for b in books]
+        engine = db.engine
+
+    commits = []
+    def record_commit(conn):
+        commits.append(conn)
+    event.listen(engine, "commit", record_commit)
+    try:
+        res = client.post("/api/loans/assign/batch", json={"assignments": [
+            {"book_id": ids[0], "user_id": 2, "return_date": due},
+            {"book_id": ids[1], "user_id": 2, "return_date": due},
+            {"book_id": ids[1], "user_id": 2, "return_date": due},
+            {"book_id": ids[2], "user_id": 2, "return_date": "not-a-date"},
+            {"book_id": 999999, "user_id": 2, "return_date": due},
+        ]}, headers=headers)
+    finally:
+        event.remove(engine, "commit", record_commit)
+
+    assert res.status_code == 200
+    body = res.get_json()
+    assert [r["ok"] for r in body["results"]] == [True, True, False, False, False]
+    assert [r["msg"] for r in body["results"][2:]] == [
+        "Duplicate book_id in batch", "Invalid return_date format", "Book not available"
+    ]
+    assert (body["succeeded"], body["failed"]) == (2, 3)
+    assert len(commits) == 1
+
+    res = client.post("/api/loans/return/batch", json={"book_ids": [ids[0], ids[1], ids[2]]},
+                      headers=headers)
+    assert [r["ok"] for r in res.get_json()["results"]] == [True, True, False]
+    with app.app_context():
+        states = [(b.available, b.due_date) for b in Book.query.filter(Book.id.in_(ids)).order_by(Book.id)]
+        assert states == [(True, None)] * 3
+
+def test_batch_rejects_oversized_request(client, admin_token):
+    res = client.post("/api/loans/return/batch", json={"book_ids": list(range(501))},
+                      headers={"Authorization": f"Bearer {admin_token}"})
+    assert res.status_code == 400
+
+def test_assign_rejects_non_integer_ids(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    for body in ({"book_id": "1", "user_id": 2}, {"book_id": 1, "user_id": True}, {"book_id": 1}):
+        res = client.post("/api/loans/assign", json={**body, "return_date": "2030-01-01"}, headers=headers)
+        assert res.status_code == 400
+        assert res.get_json() == {"msg": "book_id and user_id must be integers"}
+
+def test_batch_rejects_boolean_ids(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    res = client.post("/api/loans/return/batch", json={"book_ids": [True]}, headers=headers)
+    assert res.status_code == 400
+    res = client.post("/api/loans/assign/batch", json={"assignments": [
+        {"book_id": True, "user_id": 2, "return_date": "2030-01-01"}
+    ]}, headers=headers)
+    assert res.get_json()["results"][0]["msg"] == "book_id and user_id must be integers"
+
+def test_overdue_report(client, admin_token, app):
+    import csv
+    import io
+    from app import db
+    from app.models import Book, BorrowedBook
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    with app.app_context():
+        for i, days_late in enumerate((3, 10)):
+            due = date.today() - timedelta(days=days_late)
+            book = Book(title=f"Late {i}", author="A", isbn=f"late-{i}", category="Late",
+                        available=False, due_date=due, borrower_id=2)
+            db.session.add(book)
+            db.session.flush()
+            db.session.add(BorrowedBook(user_id=2, book_id=book.id, return_date=due))
+        # due today is not overdue yet
+        book = Book(title="On time", author="A", isbn="late-x", category="Late",
+                    available=False, due_date=date.today(), borrower_id=2)
+        db.session.add(book)
+        db.session.flush()
+        db.session.add(BorrowedBook(user_id=2, book_id=book.id, return_date=date.today()))
+        db.session.commit()
+
+    loans = client.get("/api/loans/overdue", headers=headers).get_json()
+    assert [(l["title"], l["days_overdue"], l["user_id"]) for l in loans] == [
+        ("Late 1", 10, 2), ("Late 0", 3, 2)
+    ]
+
+    page = client.get("/api/loans/overdue?limit=1", headers=headers).get_json()
+    assert len(page["items"]) == 1 and page["next_cursor"]
+
+    grouped = client.get("/api/loans/overdue?group_by=user", headers=headers).get_json()
+    assert grouped == [{
+        "user_id": 2, "username": loans[0]["username"], "overdue_count": 2,
+        "oldest_return_date": (date.today() - timedelta(days=10)).isoformat()
+    }]
+
+    res = client.get("/api/loans/overdue?format=csv", headers=headers)
+    assert res.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(res.get_data(as_text=True))))
+    assert [r["title"] for r in rows] == ["Late 1", "Late 0"]
+
+    assert client.get("/api/loans/overdue?group_by=book", headers=headers).status_code == 400
+
+def test_user_loan_listings(client, admin_token, user_token, app):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    due = (date.today() + timedelta(days=7)).isoformat()
+    for book_id in (3, 4):
+        client.post("/api/loans/assign", json={
+            "book_id": book_id, "user_id": 2, "return_date": due
+        }, headers=headers)
+    client.post("/api/loans/return/3", headers=headers)
+
+    page = client.get("/api/users/2/loans?active=true", headers=headers).get_json()
+    assert [(l["book_id"], l["returned"]) for l in page["items"]][0] == (4, False)
+    assert all(not l["returned"] for l in page["items"])
+    assert page["items"][0]["title"]
+
+    first = client.get("/api/loans/mine?limit=1", headers={
+        "Authorization": f"Bearer {user_token}"
+    }).get_json()
+    assert len(first["items"]) == 1 and first["next_cursor"]
+    second = client.get(f"/api/loans/mine?limit=1&after={first['next_cursor']}", headers={
+        "Authorization": f"Bearer {user_token}"
+    }).get_json()
+    assert second["items"][0]["id"] < first["items"][0]["id"]
+
+    assert client.get("/api/users/999/loans", headers=headers).status_code == 404
+    assert client.get("/api/users/2/loans", headers={
+        "Authorization": f"Bearer {user_token}"
+    }).status_code == 403
+
+def test_archived_loans_stay_in_user_history(client, admin_token, app):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    due = (date.today() + timedelta(days=7)).isoformat()
+    for book_id in (1, 2, 3):
+        client.post("/api/loans/assign", json={
+            "book_id": book_id, "user_id": 2, "return_date": due
+        }, headers=headers)
+    client.post("/api/loans/return/batch", json={"book_ids": [1, 2, 3]}, headers=headers)
+    client.post("/api/loans/assign", json={
+        "book_id": 1, "user_id": 2, "return_date": due
+    }, headers=headers)
+    before = client.get("/api/users/2/loans", headers=headers).get_json()["items"]
+    returned_before = client.get("/api/users/2/loans?active=false", headers=headers).get_json()["items"]
+
+    with app.app_context():
+        from app import db
+        from app.models import BorrowedBook, LoanHistory
+        from app.loans.archive import archive_returned_loans
+        assert archive_returned_loans(db.engine, 30, batch_size=2) == 0
+        returned = BorrowedBook.query.filter_by(returned=True).count()
+        assert archive_returned_loans(db.engine, 30, batch_size=2,
+                                      today=date.today() + timedelta(days=31)) == returned
+        assert BorrowedBook.query.filter_by(returned=True).count() == 0
+        assert LoanHistory.query.count() == returned
+
+    assert client.get("/api/users/2/loans", headers=headers).get_json()["items"] == before
+    assert before[0]["book_id"] == 1 and not before[0]["returned"]
+    first = client.get("/api/users/2/loans?active=false&limit=2", headers=headers).get_json()
+    rest = client.get(f"/api/users/2/loans?active=false&after={first['next_cursor']}",
+                      headers=headers).get_json()
+    assert first["items"] + rest["items"] == returned_before
+    assert [l["book_id"] for l in first["items"]] == [3, 2]
+
+def test_return_hands_book_to_head_of_hold_queue(client, admin_token, user_token, app):
+    admin = {"Authorization": f"Bearer {admin_token}"}
+    user = {"Authorization": f"Bearer {user_token}"}
+    due = (date.today() + timedelta(days=7)).isoformat()
+    with app.app_context():
+        from app import db, bcrypt
+        from app.models import User, Book
+        reader = User(username="hold-reader", is_admin=False,
+                      password_hash=bcrypt.generate_password_hash("x").decode())
+        book = Book(title="Popular", author="A", isbn="hold-1", category="Test")
+        db.session.add_all([reader, book])
+        db.session.commit()
+        reader_id, book_id = reader.id, book.id
+
+    assert client.post("/api/holds", json={"book_id": book_id}, headers=user).status_code == 400
+    client.post("/api/loans/assign", json={
+        "book_id": book_id, "user_id": reader_id, "return_date": due
+    }, headers=admin)
+
+    res = client.post("/api/holds", json={"book_id": book_id}, headers=user)
+    assert res.status_code == 201 and res.get_json()["position"] == 1
+    assert client.post("/api/holds", json={"book_id": book_id}, headers=user).status_code == 400
+    assert client.post("/api/holds", json={"book_id": book_id}, headers=admin).get_json()["position"] == 2
+    assert [h["position"] for h in client.get("/api/holds/mine", headers=user).get_json()] == [1]
+
+    res = client.post(f"/api/loans/return/{book_id}", headers=admin)
+    assert res.get_json()["user_id"] == 2
+    book = client.get("/api/books?fields=id,available", headers=admin).get_json()
+    assert {"id": book_id, "available": False} in book
+    assert client.get("/api/holds/mine", headers=user).get_json() == []
+    admin_hold = client.get("/api/holds/mine", headers=admin).get_json()
+    assert admin_hold[0]["position"] == 1
+
+    assert client.delete(f"/api/holds/{admin_hold[0]['id']}", headers=user).status_code == 403
+    assert client.delete(f"/api/holds/{admin_hold[0]['id']}", headers=admin).status_code == 200
+    res = client.post(f"/api/loans/return/{book_id}", headers=admin)
+    assert res.get_json() == {"msg": "Book returned"}
+    with app.app_context():
+        from app.loans.consistency import find_loan_state_drift
+        drift = find_loan_state_drift(db.session.connection())
+        assert drift == {"lent": [], "free": [], "duplicate_active_loans": []}
+
+def test_circulation_stats_match_rebuild(client, admin_token, app):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    past = (date.today() - timedelta(days=3)).isoformat()
+    future = (date.today() + timedelta(days=3)).isoformat()
+    with app.app_context():
+        from app import db
+        from app.models import Book
+        from app.loans.stats import rebuild_loan_stats
+        # start from counters that match the loans earlier tests wrote directly
+        rebuild_loan_stats(db.session.connection())
+        books = [Book(title=f"Stat {i}", author="A", isbn=f"stat-{i}", category="Stats") for i in range(3)]
+        db.session.add_all(books)
+        db.session.commit()
+        ids = [book.id for book in books]
+
+    for _ in range(2):
+        client.post("/api/loans/assign", json={"book_id": ids[0], "user_id": 2, "return_date": future},
+                    headers=headers)
+        client.post(f"/api/loans/return/{ids[0]}", headers=headers)
+    client.post("/api/loans/assign/batch", json={"assignments": [
+        {"book_id": ids[0], "user_id": 2, "return_date": past},
+        {"book_id": ids[1], "user_id": 2, "return_date": future},
+    ]}, headers=headers)
+
+    stats = client.get("/api/loans/stats?top=100", headers=headers).get_json()
+    ranking = {entry["book_id"]: entry["loans"] for entry in stats["most_borrowed"]}
+    assert ranking[ids[0]] == 3 and ranking[ids[1]] == 1 and ids[2] not in ranking
+    assert stats["loans_by_category"]["Stats"] == 4
+    assert stats["overdue"]["overdue_loans"] >= 1
+    assert stats["overdue"]["active_loans"] >= 2
+
+    with app.app_context():
+        rebuild_loan_stats(db.session.connection())
+        db.session.commit()
+    assert client.get("/api/loans/stats?top=100", headers=headers).get_json() == stats
+    assert client.get("/api/loans/stats?top=0", headers=headers).status_code == 400
+
+def test_hold_rejects_boolean_book_id(client, user_token):
+    res = client.post("/api/holds", json={"book_id": True},
+                      headers={"Authorization": f"Bearer {user_token}"})
+    assert res.status_code == 400
+    assert res.get_json() == {"msg": "book_id must be an integer"}
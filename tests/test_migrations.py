@@ -0,0 +1,100 @@
+import sqlite3
+from datetime import date
+import pytest
+from sqlalchemy import inspect
+from app import create_app, db, migrations
+from app.search import table_exists
+
+LEGACY_SCHEMA = """
+CREATE TABLE user (
+    id INTEGER PRIMARY KEY, username VARCHAR(80) NOT NULL UNIQUE,
+    password_hash VARCHAR(128) NOT NULL, is_admin BOOLEAN NOT NULL
+);
+CREATE TABLE book (
+    id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, author VARCHAR(120) NOT NULL,
+    isbn VARCHAR(20) NOT NULL UNIQUE, category VARCHAR(80) NOT NULL, available BOOLEAN NOT NULL
+);
+CREATE TABLE borrowed_book (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES user(id),
+    book_id INTEGER NOT NULL REFERENCES book(id), return_date DATE NOT NULL,
+    returned BOOLEAN NOT NULL
+);
+"""
+
+def _invoke(app, command):
+    runner = app.test_cli_runner()
+    if command == "db-upgrade":
+        # Registered on manage.py's own app; run it against this one
+        from manage import db_upgrade
+        return runner.invoke(db_upgrade)
+    return runner.invoke(args=[command])
+
+@pytest.mark.parametrize("command", ["init-db", "db-upgrade"])
+def test_upgrade_adds_indexes_to_legacy_database(tmp_path, command):
+    db_path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executescript("""
+        INSERT INTO user VALUES (1, 'reader', 'x', 0);
+        INSERT INTO book VALUES (1, 'Lent', 'A', 'legacy-1', 'C', 0);
+        INSERT INTO borrowed_book VALUES (1, 1, 1, '2030-01-01', 0);
+        INSERT INTO borrowed_book VALUES (2, 1, 1, '2031-01-01', 0);
+    """)
+    conn.commit()
+    conn.close()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}"})
+    result = _invoke(app, command)
+    assert result.exit_code == 0, result.output
+    assert f"Applied migration {migrations.head_version()}" in result.output
+    with app.app_context():
+        inspector = inspect(db.engine)
+        assert "ix_user_is_admin" in {i["name"] for i in inspector.get_indexes("user")}
+        assert "ix_book_available_category" in {i["name"] for i in inspector.get_indexes("book")}
+        loan_indexes = {i["name"] for i in inspector.get_indexes("borrowed_book")}
+        assert {"ix_borrowed_book_book_returned", "ux_borrowed_book_active_book"} <= loan_indexes
+        with db.engine.connect() as connection:
+            assert migrations.current_version(connection) == migrations.head_version()
+            assert table_exists(connection, "book_fts")
+            book = connection.exec_driver_sql(
+                "SELECT available, due_date, borrower_id FROM book WHERE id = 1"
+            ).one()
+            assert tuple(book) == (0, "2031-01-01", 1)
+            # the older duplicate active loan was closed
+            active = connection.exec_driver_sql(
+                "SELECT id FROM borrowed_book WHERE returned = 0"
+            ).scalars().all()
+            assert active == [2]
+        db.engine.dispose()
+
+def _query_plan(query):
+    sql = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    with db.engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+@pytest.mark.parametrize("build_query", [
+    lambda m: m.BorrowedBook.query.filter_by(book_id=1, returned=False),
+    lambda m: m.Book.query.filter(m.Book.available == True),
+    lambda m: m.Book.query.filter(m.Book.available == False, m.Book.category.ilike("%fic%")),
+    lambda m: m.User.query.filter(m.User.is_admin == True),
+    lambda m: m.BorrowedBook.query.filter(m.BorrowedBook.returned.is_(False),
+                                          m.BorrowedBook.return_date < date(2030, 1, 1)),
+    lambda m: m.BorrowedBook.query.filter(m.BorrowedBook.user_id == 2, m.BorrowedBook.returned.is_(False)),
+    lambda m: m.Hold.query.with_entities(db.func.min(m.Hold.id))
+                          .filter(m.Hold.book_id.in_([1, 2])).group_by(m.Hold.book_id),
+    lambda m: m.User.query.filter(m.User.username_lower >= "rea", m.User.username_lower < "reb")
+                          .order_by(m.User.username_lower).limit(20),
+])
+def test_hot_lookups_use_indexes(app, build_query):
+    from app import models
+    with app.app_context():
+        plan = _query_plan(build_query(models))
+    assert "USING INDEX" in plan or "USING COVERING INDEX" in plan, plan
+    assert "SCAN" not in plan, plan
+
+def test_added_columns_quote_reserved_names():
+    from sqlalchemy.dialects import postgresql
+    from app.models import User
+    sql = migrations._add_column_sql(postgresql.dialect(), User.__table__.c.username_lower)
+    assert sql == 'ALTER TABLE "user" ADD COLUMN username_lower VARCHAR(80)'
@@ -1,3 +1,7 @@
+from app import create_app, db
+from app.bootstrap import init_db
+from app.models import User
+
 def test_list_users_unauthenticated(client):
     res = client.get("/api/users")
     assert res.status_code == 401
@@ -31,3 +35,122 @@ def test_add_user_conflict(client, admin_token):
         "username": "admin", "password": "pass"
     }, headers={"Authorization": f"Bearer {admin_token}"})
     assert res.status_code == 400
+
+def test_search_users_paginated(client, admin_token):
+    res = client.get("/api/users/search?is_admin=true&limit=1", headers={
+        "Authorization": f"Bearer {admin_token}"
+    })
+    assert res.status_code == 200
+    page = res.get_json()
+    assert [u["username"] for u in page["items"]] == ["admin"]
+    assert page["next_cursor"] is None
+
+def test_list_users_sparse_fields(client, admin_token):
+    res = client.get("/api/users?fields=username", headers={
+        "Authorization": f"Bearer {admin_token}"
+    })
+    assert res.status_code == 200
+    assert {"username": "admin"} in res.get_json()
+    assert all(list(u) == ["username"] for u in res.get_json())
+
+def test_bulk_import_users(client, admin_token, app):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    body = "\n".join([
+        "username,password,is_admin",
+        "student1,pw-one,false",
+        "student2,pw-two,",
+        "student1,pw-again,false",
+        "admin,taken,true",
+        "nopassword,,false",
+        "staff1,pw-staff,true",
+    ])
+    res = client.post("/api/users/bulk", data=body, content_type="text/csv", headers=headers)
+    assert res.status_code == 200
+    report = res.get_json()
+    assert (report["rows"], report["inserted"], report["failed"]) == (6, 3, 3)
+    assert [(e["row"], e["error"]) for e in report["errors"]] == [
+        (3, "Duplicate username in input"),
+        (4, "Username already exists"),
+        (5, "Missing fields: password"),
+    ]
+
+    ndjson = '{"username": "student3", "password": "pw-three"}\n[1]\n'
+    report = client.post("/api/users/bulk", data=ndjson, content_type="application/x-ndjson",
+                         headers=headers).get_json()
+    assert (report["inserted"], report["failed"]) == (1, 1)
+
+    login = client.post("/api/auth/login", json={"username": "student2", "password": "pw-two"})
+    assert login.status_code == 200
+    staff = client.get("/api/users/search?username=staff1", headers=headers).get_json()
+    assert staff[0]["is_admin"] is True
+
+def test_bulk_import_users_decodes_utf8(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    bom = "\ufeffusername,password\nbom-user,pw\n".encode("utf-8")
+    report = client.post("/api/users/bulk", data=bom, content_type="text/csv", headers=headers).get_json()
+    assert (report["inserted"], report["errors"]) == (1, [])
+
+    rows = "".join(f"latin-user-{i:04d},password-{i}\n" for i in range(400))
+    body = ("username,password\n" + rows).encode() + "jos\u00e9,pw\n".encode("latin-1")
+    res = client.post("/api/users/bulk", data=body, content_type="text/csv", headers=headers)
+    assert res.status_code == 200
+    report = res.get_json()
+    assert 0 < report["inserted"] < 400
+    assert report["errors"][-1]["row"] == report["inserted"] + 1
+    assert "not valid UTF-8" in report["errors"][-1]["error"]
+
+def test_bulk_hasher_uses_worker_processes(app):
+    from app.passwords import bulk_hasher, check_password
+    with app.app_context():
+        with bulk_hasher(workers=2) as hash_all:
+            hashes = hash_all(["a", "b", "c"])
+        assert [check_password(h, p) for h, p in zip(hashes, "abc")] == [True] * 3
+
+def test_search_users_ranked_prefix(client, admin_token, app):
+    from app.users.importer import import_users
+    import io
+    with app.app_context():
+        names = ["Reader", "reader2", "ReaderOne", "proofreader", "rea_d", "other"]
+        body = "username,password\n" + "\n".join(f"{name},pw" for name in names)
+        assert import_users(io.BytesIO(body.encode()), "csv")["inserted"] == len(names)
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    def search(query):
+        res = client.get(f"/api/users/search?{query}", headers=headers)
+        assert res.status_code == 200
+        return [u["username"] for u in res.get_json()]
+
+    assert search("username=READER") == ["Reader", "reader2", "ReaderOne"]
+    assert search("username=reader&limit=2") == ["Reader", "reader2"]
+    assert search("username=rea_") == ["rea_d"]
+    assert search("username=reader&match=contains") == ["Reader", "reader2", "ReaderOne", "proofreader"]
+    assert client.get("/api/users/search?username=r&limit=0", headers=headers).status_code == 400
+    assert client.get("/api/users/search?username=r&match=fuzzy", headers=headers).status_code == 400
+    assert client.get("/api/users/search?username=r&after=3", headers=headers).status_code == 400
+
+def test_search_users_spec_lists_each_parameter_once(client):
+    spec = client.get("/apispec.json").get_json()
+    names = [p["name"] for p in spec["paths"]["/api/users/search"]["get"]["parameters"]]
+    assert len(names) == len(set(names))
+
+def test_trigram_substring_search():
+    from app.users.search import apply_username_search
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "USER_SUBSTRING_SEARCH": "trigram",
+    })
+    with app.app_context():
+        init_db()
+        assert app.extensions["user_trigram_search"] is True
+        db.session.add_all([User(username=name, password_hash="x") for name in ("Bookworm", "worm_fan")])
+        db.session.commit()
+        db.session.get(User, 1).username = "Wormwood"
+        db.session.commit()
+
+        def contains(term):
+            return [u.username for u in apply_username_search(User.query, term, "contains")]
+
+        assert contains("WORM") == ["worm_fan", "Wormwood", "Bookworm"]
+        assert contains("admin") == []
+        assert contains("m_") == ["worm_fan"]
+        db.drop_all()